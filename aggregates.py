@@ -0,0 +1,234 @@
+"""Precomputed statistics shared by the dashboard pages.
+
+Every summary view (KPIs, revenue split, RFM tables, download summaries) is a
+function of per-segment counts, sums, means, extremes and quantiles. The cube
+computes those once per data version at segment-by-cluster grain plus a
+segment-level roll-up, so page reruns read a handful of rows instead of
+regrouping the full customer frame. Distribution charts are likewise drawn from
+exact histogram counts and box-plot statistics rather than from row samples.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+METRICS = ['recency_days', 'frequency', 'monetary']
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def group_stats(df, by, metrics=METRICS, quantiles=QUANTILES):
+    """Count, sum, mean, min, max and quantiles of ``metrics`` per group in one grouped pass"""
+    grouped = df.groupby(by, observed=True)
+    stats = grouped[metrics].agg(['sum', 'mean', 'min', 'max'])
+    stats.columns = [f"{metric}_{stat}" for metric, stat in stats.columns]
+
+    if quantiles:
+        quantile_stats = grouped[metrics].quantile(list(quantiles)).unstack(level=-1)
+        quantile_stats.columns = [f"{metric}_q{round(q * 100)}" for metric, q in quantile_stats.columns]
+        stats = stats.join(quantile_stats)
+
+    stats.insert(0, 'Customers', grouped.size())
+    if 'monetary' in metrics:
+        stats['Revenue_Percent'] = stats['monetary_sum'] / stats['monetary_sum'].sum() * 100
+    return stats
+
+
+def rollup(stats, level, metrics=METRICS):
+    """Re-aggregate finer-grained stats to ``level`` (quantiles do not roll up and are dropped)"""
+    grouped = stats.groupby(level=level, observed=True)
+    rolled = pd.DataFrame({'Customers': grouped['Customers'].sum()})
+    for metric in metrics:
+        rolled[f"{metric}_sum"] = grouped[f"{metric}_sum"].sum()
+        rolled[f"{metric}_mean"] = rolled[f"{metric}_sum"] / rolled['Customers']
+        rolled[f"{metric}_min"] = grouped[f"{metric}_min"].min()
+        rolled[f"{metric}_max"] = grouped[f"{metric}_max"].max()
+    if 'monetary' in metrics:
+        rolled['Revenue_Percent'] = rolled['monetary_sum'] / rolled['monetary_sum'].sum() * 100
+    return rolled
+
+
+@dataclass
+class SegmentCube:
+    """Segment statistics at (Segment_Name, Cluster) and Segment_Name grain"""
+    by_cluster: pd.DataFrame
+    by_segment: pd.DataFrame
+
+    @property
+    def customers(self):
+        return int(self.by_segment['Customers'].sum())
+
+    @property
+    def total_revenue(self):
+        return float(self.by_segment['monetary_sum'].sum())
+
+    def overall_mean(self, metric):
+        """Customer-weighted mean of a metric across every segment"""
+        return float(self.by_segment[f"{metric}_sum"].sum() / max(self.customers, 1))
+
+    def filtered(self, segments=None, clusters=None):
+        """Segment-level stats restricted to the selected segments and clusters"""
+        stats = self.by_cluster
+        if segments is not None:
+            stats = stats[stats.index.get_level_values('Segment_Name').isin(list(segments))]
+        if clusters is not None:
+            stats = stats[stats.index.get_level_values('Cluster').isin(list(clusters))]
+        return rollup(stats, 'Segment_Name')
+
+    def revenue_stats(self):
+        """Revenue by segment in the shape the pages display, largest first"""
+        stats = self.by_segment
+        revenue = pd.DataFrame({
+            'Total_Revenue': stats['monetary_sum'].round(2),
+            'Avg_Spent': stats['monetary_mean'].round(2),
+            'Customers': stats['Customers'],
+            'Revenue_Percent': stats['Revenue_Percent'].round(1),
+        })
+        return revenue.sort_values('Total_Revenue', ascending=False)
+
+
+def build_segment_cube(segments_df):
+    """Compute the segment cube from the customer segments frame"""
+    by_cluster = group_stats(segments_df, ['Segment_Name', 'Cluster'])
+    by_segment = group_stats(segments_df, 'Segment_Name')
+    return SegmentCube(by_cluster=by_cluster, by_segment=by_segment)
+
+
+@dataclass
+class DistributionStats:
+    """Exact histogram counts and box-plot statistics of one numeric column"""
+    count: int
+    mean: float
+    minimum: float
+    q1: float
+    median: float
+    q3: float
+    maximum: float
+    lower_whisker: float
+    upper_whisker: float
+    outliers_low: int
+    outliers_high: int
+    bin_edges: np.ndarray
+    bin_counts: np.ndarray
+    outlier_sample: np.ndarray
+
+    @property
+    def outliers(self):
+        return self.outliers_low + self.outliers_high
+
+
+def _spread_sample(sorted_values, limit):
+    """Up to ``limit`` values spread evenly across an already sorted array"""
+    if len(sorted_values) <= limit:
+        return sorted_values
+    return sorted_values[np.unique(np.linspace(0, len(sorted_values) - 1, limit).astype(np.int64))]
+
+
+def distribution_stats(values, bins=50, whisker=1.5, max_outliers=0):
+    """Histogram and box-plot statistics from a single sort of the values.
+
+    Whiskers follow the Tukey convention: the most extreme values within
+    ``whisker`` IQRs of the quartiles; anything beyond is counted as an outlier.
+    ``max_outliers`` keeps a capped, evenly spread sample of the outliers on each
+    side for plotting; ``bins=0`` skips the histogram. Returns None when there
+    are no finite values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = np.sort(values[np.isfinite(values)])
+    n = len(values)
+    if n == 0:
+        return None
+
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - whisker * iqr, q3 + whisker * iqr
+    lo = np.searchsorted(values, low_fence, side='left')
+    hi = np.searchsorted(values, high_fence, side='right')
+
+    if bins:
+        bin_edges = np.linspace(values[0], values[-1], bins + 1)
+        inner = np.searchsorted(values, bin_edges[1:-1], side='left')
+        bin_counts = np.diff(np.concatenate(([0], inner, [n])))
+    else:
+        bin_edges, bin_counts = np.empty(0), np.empty(0, dtype=np.int64)
+
+    outlier_sample = np.concatenate((
+        _spread_sample(values[:lo], max_outliers),
+        _spread_sample(values[hi:], max_outliers),
+    )) if max_outliers else np.empty(0)
+
+    return DistributionStats(
+        count=n,
+        mean=float(values.mean()),
+        minimum=float(values[0]),
+        q1=float(q1),
+        median=float(median),
+        q3=float(q3),
+        maximum=float(values[-1]),
+        lower_whisker=float(values[lo]),
+        upper_whisker=float(values[hi - 1]),
+        outliers_low=int(lo),
+        outliers_high=int(n - hi),
+        bin_edges=bin_edges,
+        bin_counts=bin_counts,
+        outlier_sample=outlier_sample,
+    )
+
+
+def grouped_distribution_stats(df, by, column, transform=None, max_outliers=100, whisker=1.5):
+    """Box-plot statistics of ``column`` for each group, with capped outlier samples"""
+    stats = {}
+    for name, values in df.groupby(by, observed=True)[column]:
+        values = values.to_numpy(dtype=np.float64)
+        if transform is not None:
+            values = transform(values)
+        group_stats_ = distribution_stats(values, bins=0, whisker=whisker, max_outliers=max_outliers)
+        if group_stats_ is not None:
+            stats[name] = group_stats_
+    return stats
+
+
+def histogram_distribution_stats(bin_edges, bin_counts, mean, minimum, maximum, whisker=1.5):
+    """Approximate box-plot statistics from fixed-edge histogram counts.
+
+    Used when the values were only ever seen in chunks. Quantiles and outlier
+    counts are interpolated linearly inside a bin, so they are accurate to one
+    bin width; the histogram is trimmed to the occupied bins.
+    """
+    counts = np.asarray(bin_counts, dtype=np.int64)
+    occupied = np.flatnonzero(counts)
+    if len(occupied) == 0:
+        return None
+    counts = counts[occupied[0]:occupied[-1] + 1]
+    bin_edges = np.asarray(bin_edges, dtype=np.float64)[occupied[0]:occupied[-1] + 2]
+
+    n = int(counts.sum())
+    edges = np.clip(bin_edges, minimum, maximum)
+    cumulative = np.concatenate(([0], np.cumsum(counts))).astype(np.float64)
+
+    def value_at(rank):
+        i = int(np.clip(np.searchsorted(cumulative, rank, side='left'), 1, len(counts)))
+        fraction = (rank - cumulative[i - 1]) / counts[i - 1]
+        return float(edges[i - 1] + fraction * (edges[i] - edges[i - 1]))
+
+    q1, median, q3 = (value_at(q * n) for q in QUANTILES)
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - whisker * iqr, q3 + whisker * iqr
+    outliers_low = int(round(np.interp(low_fence, edges, cumulative)))
+    outliers_high = int(round(n - np.interp(high_fence, edges, cumulative)))
+
+    return DistributionStats(
+        count=n,
+        mean=float(mean),
+        minimum=float(minimum),
+        q1=q1,
+        median=median,
+        q3=q3,
+        maximum=float(maximum),
+        lower_whisker=float(max(low_fence, minimum)),
+        upper_whisker=float(min(high_fence, maximum)),
+        outliers_low=outliers_low,
+        outliers_high=outliers_high,
+        bin_edges=bin_edges,
+        bin_counts=counts,
+        outlier_sample=np.empty(0),
+    )
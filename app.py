@@ -6,8 +6,26 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import warnings
 import io
+import os
 from datetime import datetime
 from typing import Optional
+
+from clustering import PROFILES_PATH, SELECTION_PATH
+from data_cache import (
+    INGEST_ARTEFACTS, RAW_DATA_PATH, RFM_SCORES_PATH, SEGMENTS_PATH, data_version, load_artefact, load_transactions
+)
+from exports import EXPORT_FORMATS, discard_export, export_filename, export_mime, write_export
+from aggregates import build_segment_cube, group_stats, grouped_distribution_stats
+from dimensions import DIMENSIONS_PATH, load_dimensions
+from feature_store import load_feature_store
+from indexes import paginate
+from insights import INSIGHT_RULES_PATH, load_insight_rules, segment_insights
+from registry import DataRegistry
+from reports import REPORT_FORMATS, build_report, render_report
+from sampling import stratified_sample
+from raw_aggregates import RAW_AGGREGATES_PATH, load_raw_aggregates
+from rfm import QUINTILES, score_rfm
+from schema import PROFILE_SCHEMA, RFM_SCHEMA, SEGMENT_SCHEMA, apply_schema
 warnings.filterwarnings('ignore')
 
 # Page configuration
@@ -259,106 +277,282 @@ def render_kpi_card(icon: str, label: str, value: str, helper: Optional[str] = N
     """
     st.markdown(card_html, unsafe_allow_html=True)
 
+def histogram_figure(stats, title: str, x_label: str, log_x: bool = False):
+    """Bar chart of precomputed histogram bin counts (a filled step outline on a log axis)"""
+    edges = stats.bin_edges
+    if log_x:
+        edges = np.maximum(edges, edges[edges > 0].min() if (edges > 0).any() else 1.0)
+        fig = go.Figure(go.Scatter(
+            x=edges,
+            y=np.append(stats.bin_counts, stats.bin_counts[-1]),
+            mode='lines',
+            line_shape='hv',
+            fill='tozeroy',
+            marker_color='#636EFA',
+            hovertemplate=f"{x_label} from: %{{x:,.2f}}<br>Frequency: %{{y:,}}<extra></extra>"
+        ))
+        fig.update_xaxes(type='log')
+    else:
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=stats.bin_counts,
+            width=np.diff(edges),
+            marker_color='#636EFA',
+            hovertemplate=f"{x_label}: %{{x:,.2f}}<br>Frequency: %{{y:,}}<extra></extra>"
+        ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title="Frequency", bargap=0)
+    return fig
+
+def box_figure(stats, title: str, y_label: str):
+    """Box plot drawn from precomputed quartiles and whiskers"""
+    fig = go.Figure(go.Box(
+        name=y_label,
+        q1=[stats.q1],
+        median=[stats.median],
+        q3=[stats.q3],
+        lowerfence=[stats.lower_whisker],
+        upperfence=[stats.upper_whisker],
+        mean=[stats.mean],
+        marker_color='#636EFA'
+    ))
+    fig.update_layout(title=title, yaxis_title=y_label, showlegend=False)
+    return fig
+
+def grouped_box_figure(stats_by_group, title: str, y_label: str):
+    """Per-segment box plots from precomputed statistics, with capped outlier markers"""
+    fig = go.Figure()
+    for name, stats in stats_by_group.items():
+        color = get_segment_color(str(name))
+        fig.add_trace(go.Box(
+            x=[name],
+            name=str(name),
+            q1=[stats.q1],
+            median=[stats.median],
+            q3=[stats.q3],
+            lowerfence=[stats.lower_whisker],
+            upperfence=[stats.upper_whisker],
+            mean=[stats.mean],
+            marker_color=color
+        ))
+        if len(stats.outlier_sample):
+            fig.add_trace(go.Scatter(
+                x=[name] * len(stats.outlier_sample),
+                y=stats.outlier_sample,
+                mode='markers',
+                marker=dict(color=color, size=4, opacity=0.6),
+                name=f"{name} outliers",
+                hovertemplate=f"{y_label}: %{{y:,.2f}}<extra></extra>"
+            ))
+    fig.update_layout(title=title, xaxis_title="Segment", yaxis_title=y_label, showlegend=False)
+    return fig
+
+def _discard_prepared_export(key: str) -> None:
+    """Forget a prepared export and remove its temporary file"""
+    prepared = st.session_state.pop(key, None)
+    if prepared is not None:
+        discard_export(prepared['path'])
+
+def render_export(label: str, key: str, load_frame, file_stem: str, signature=None) -> None:
+    """Render a format picker and an on-demand export; the file is only built when requested.
+    
+    ``signature`` identifies the data being exported (e.g. the active filters) so a
+    prepared file is not offered once the underlying selection has changed. Only the
+    path of the prepared file is kept in the session; the file is removed once it is
+    downloaded or goes stale, and files of abandoned sessions are swept after
+    ``EXPORT_TTL_SECONDS`` (see ``exports.py``).
+    """
+    col_format, col_action = st.columns([1, 2])
+    with col_format:
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS), key=f"{key}_format")
+    with col_action:
+        if st.button(f"⚙️ Prepare {label}", key=f"{key}_prepare"):
+            _discard_prepared_export(key)
+            with st.spinner(f"Preparing {label.lower()}..."):
+                path = write_export(load_frame(), export_format)
+                st.session_state[key] = {'format': export_format, 'signature': signature, 'path': path}
+        prepared = st.session_state.get(key)
+        if prepared is None:
+            return
+        if (prepared['format'], prepared['signature']) != (export_format, signature) or not os.path.exists(prepared['path']):
+            _discard_prepared_export(key)
+            return
+        with open(prepared['path'], 'rb') as fh:
+            st.download_button(
+                label=f"📥 Download {label}",
+                data=fh,
+                file_name=export_filename(file_stem, export_format),
+                mime=export_mime(export_format),
+                key=f"{key}_download",
+                on_click=_discard_prepared_export,
+                args=(key,)
+            )
+
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
-@st.cache_data
+def read_segments(path=SEGMENTS_PATH):
+    """Read the customer segments file with its compact schema"""
+    return apply_schema(pd.read_csv(path), SEGMENT_SCHEMA)
+
+@st.cache_resource
+def get_registry():
+    """Process-wide registry of the shared data frames, versioned by file content"""
+    registry = DataRegistry()
+    registry.register('segments', [SEGMENTS_PATH], read_segments)
+    registry.register('profiles', [PROFILES_PATH], lambda path: apply_schema(pd.read_csv(path), PROFILE_SCHEMA))
+    registry.register('rfm', [RFM_SCORES_PATH], lambda path: apply_schema(pd.read_csv(path), RFM_SCHEMA))
+    registry.register('raw', [RAW_DATA_PATH], load_transactions)
+    return registry
+
+def dataset_version(*names):
+    """Content version of registered datasets, used to key derived caches"""
+    return get_registry().version(*names)
+
 def load_data():
-    """Load all necessary data files"""
+    """Load all necessary data files (shared frames: take a ``.copy()`` before modifying one)"""
+    registry = get_registry()
     try:
-        segments_df = pd.read_csv('Data/processed/kmeans_customer_segments.csv')
-        profiles_df = pd.read_csv('Data/processed/cluster_profiles.csv')
-        rfm_df = pd.read_csv('Data/processed/rfm_scores.csv')
-        return segments_df, profiles_df, rfm_df
+        return registry.get('segments'), registry.get('profiles'), registry.get('rfm')
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None, None, None
 
-@st.cache_data
 def load_raw_data():
-    """Load raw transaction data from bank_data_C.csv"""
+    """Load raw transaction data from bank_data_C.csv via its columnar cache"""
     try:
-        raw_df = pd.read_csv('Data/bank_data_C.csv')
-        raw_df = raw_df.copy()
-        
-        if 'TransactionDate' in raw_df.columns:
-            raw_df['TransactionDate'] = pd.to_datetime(raw_df['TransactionDate'], format='%d/%m/%y', errors='coerce')
-        
-        if 'TransactionAmount (INR)' in raw_df.columns:
-            raw_df = raw_df.rename(columns={'TransactionAmount (INR)': 'TransactionAmount'})
-        
-        if 'CustomerDOB' in raw_df.columns:
-            raw_df['CustomerDOB'] = pd.to_datetime(raw_df['CustomerDOB'], format='%d/%m/%y', errors='coerce')
-        
-        return raw_df
+        return get_registry().get('raw')
     except Exception as e:
         st.warning(f"Could not load raw data: {e}")
         return None
 
+@st.cache_data
+def load_model_selection(version):
+    """KMeans k-sweep results written by ``python clustering.py select``"""
+    if not SELECTION_PATH.exists():
+        return None
+    return pd.read_csv(SELECTION_PATH)
+
+@st.cache_data
+def rescore_rfm(_rfm_df, version, boundaries):
+    """Recompute RFM scores and rule-based segments for the given band boundaries"""
+    return score_rfm(_rfm_df, boundaries)
+
+@st.cache_data
+def load_segment_cube(version):
+    """Segment-by-cluster statistics, computed once per data version from the mapped feature store"""
+    return build_segment_cube(get_feature_store().metrics_frame())
+
+def get_segment_cube():
+    """Return the cached segment cube for the current segments file"""
+    return load_segment_cube(dataset_version('segments'))
+
+@st.cache_data
+def load_rules(version):
+    """Insight rule sets, re-read when ``Data/insight_rules.json`` changes"""
+    return load_insight_rules(INSIGHT_RULES_PATH)
+
+@st.cache_data
+def load_segment_insights(_stats, version, rules_version):
+    """Insight messages for every row of a per-segment statistics table"""
+    return segment_insights(_stats, load_rules(rules_version))
+
+@st.cache_data
+def load_rfm_segment_stats(_rfm_df, version):
+    """Per-segment statistics of the rule-based RFM segments"""
+    return group_stats(_rfm_df, 'segment', quantiles=())
+
+@st.cache_data
+def load_raw_artefact(name, version):
+    """Ingest-time artefact of the raw transactions (built here only if the cache could not store it)"""
+    artefact = load_artefact(name, RAW_DATA_PATH)
+    if artefact is None:
+        raw_df = load_raw_data()
+        if raw_df is not None:
+            build, _ = INGEST_ARTEFACTS[name]
+            artefact = build(raw_df)
+    return artefact
+
+@st.cache_data
+def load_streamed_aggregates(version):
+    """Raw Data aggregates saved by streaming mode; None when absent or stale"""
+    return load_raw_aggregates(RAW_AGGREGATES_PATH, RAW_DATA_PATH)
+
+@st.cache_data
+def load_dimension_aggregates(version):
+    """Location/gender/segment table saved by ``python pipeline.py``; None when absent or stale"""
+    return load_dimensions(DIMENSIONS_PATH, RAW_DATA_PATH, SEGMENTS_PATH)
+
+def get_dimension_aggregates():
+    """Return the cached dimension table for the current transactions and segments"""
+    return load_dimension_aggregates(data_version(DIMENSIONS_PATH, RAW_DATA_PATH, SEGMENTS_PATH))
+
+def select_segments(segments_df, segments, clusters):
+    """Rows of the selected segments and clusters"""
+    return segments_df[
+        (segments_df['Segment_Name'].isin(segments)) &
+        (segments_df['Cluster'].isin(clusters))
+    ]
+
+@st.cache_data
+def load_segment_box_stats(_segments_df, version, segments, clusters):
+    """Per-segment box statistics for the selected segments and clusters"""
+    filtered_df = select_segments(_segments_df, segments, clusters)
+    return {
+        'recency_days': grouped_distribution_stats(filtered_df, 'Segment_Name', 'recency_days'),
+        'frequency': grouped_distribution_stats(filtered_df, 'Segment_Name', 'frequency'),
+        'monetary': grouped_distribution_stats(filtered_df, 'Segment_Name', 'monetary', transform=np.log1p)
+    }
+
+@st.cache_data
+def load_scatter_sample(_segments_df, version, segments, clusters, sample_size, seed):
+    """Stratified, density-thinned sample of the selected customers for the 3D scatter"""
+    filtered_df = select_segments(_segments_df, segments, clusters)
+    positions = stratified_sample(filtered_df, 'Segment_Name', sample_size, seed=seed)
+    sample_df = filtered_df.iloc[positions].copy()
+    sample_df['Segment_Name'] = sample_df['Segment_Name'].astype(str)
+    return sample_df
+
+@st.cache_resource
+def load_customer_store(version):
+    """Memory-mapped customer feature store, mapped once per process and shared by every session.
+
+    Writing a missing version reads the segments file directly rather than
+    through the registry, so the frame is not kept in this process afterwards.
+    """
+    return load_feature_store(read_segments, version)
+
+def get_feature_store():
+    """Return the shared feature store for the current segments file"""
+    return load_customer_store(dataset_version('segments'))
+
+@st.cache_resource
+def load_customer_index(_store, version):
+    """CustomerID index over the feature store's mapped arrays"""
+    return _store.customer_index()
+
+def get_customer_index():
+    """Return the shared customer index for the current segments file"""
+    return load_customer_index(get_feature_store(), dataset_version('segments'))
+
+@st.cache_resource
+def load_range_index(_store, version):
+    """Per-segment recency/monetary index over the feature store's mapped arrays"""
+    return _store.range_index()
+
+def get_range_index():
+    """Return the shared range index for the current segments file"""
+    return load_range_index(get_feature_store(), dataset_version('segments'))
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def calculate_revenue_stats(segments_df):
-    """Calculate revenue statistics by segment"""
-    revenue_stats = segments_df.groupby('Segment_Name').agg({
-        'monetary': ['sum', 'mean', 'count']
-    }).round(2)
-    revenue_stats.columns = ['Total_Revenue', 'Avg_Spent', 'Customers']
-    revenue_stats['Revenue_Percent'] = (revenue_stats['Total_Revenue'] / 
-                                       revenue_stats['Total_Revenue'].sum() * 100).round(1)
-    return revenue_stats.sort_values('Total_Revenue', ascending=False)
-
-def generate_cluster_insights(segment_name, segments_df, revenue_stats):
-    """Generate automated insights for a cluster"""
-    segment_data = segments_df[segments_df['Segment_Name'] == segment_name]
-    
-    if len(segment_data) == 0:
-        return ""
-    
-    avg_recency = segment_data['recency_days'].mean()
-    avg_frequency = segment_data['frequency'].mean()
-    avg_monetary = segment_data['monetary'].mean()
-    customer_count = len(segment_data)
-    revenue_pct = revenue_stats.loc[segment_name, 'Revenue_Percent']
-    
-    insights = []
-    
-    # Recency insights
-    if avg_recency < 50:
-        insights.append(f"✅ Excellent recency ({avg_recency:.1f} days) - customers are very active")
-    elif avg_recency < 60:
-        insights.append(f"⚠️ Moderate recency ({avg_recency:.1f} days) - monitor for engagement")
-    else:
-        insights.append(f"🔴 High recency ({avg_recency:.1f} days) - requires reactivation")
-    
-    # Frequency insights
-    if avg_frequency > 1.3:
-        insights.append(f"✅ High frequency ({avg_frequency:.2f}) - loyal, repeat customers")
-    elif avg_frequency > 1.1:
-        insights.append(f"⚡ Moderate frequency ({avg_frequency:.2f}) - potential for growth")
-    else:
-        insights.append(f"📉 Low frequency ({avg_frequency:.2f}) - encourage repeat purchases")
-    
-    # Monetary insights
-    if avg_monetary > 2000:
-        insights.append(f"💰 High value customers (avg £{avg_monetary:,.0f}) - premium segment")
-    elif avg_monetary > 500:
-        insights.append(f"💵 Mid-value customers (avg £{avg_monetary:,.0f}) - upsell potential")
-    else:
-        insights.append(f"💳 Low value customers (avg £{avg_monetary:,.0f}) - growth focus")
-    
-    # Revenue contribution
-    insights.append(f"📊 Represents {customer_count:,} customers ({customer_count/len(segments_df)*100:.1f}%) generating {revenue_pct:.1f}% of total revenue")
-    
-    return "\n".join(insights)
-
-def create_cluster_card(segment_name, segments_df, revenue_stats):
+def create_cluster_card(segment_name, cube):
     """Create a styled cluster card"""
-    segment_data = segments_df[segments_df['Segment_Name'] == segment_name]
-    if len(segment_data) == 0:
+    if segment_name not in cube.by_segment.index:
         return None
+    stats = cube.by_segment.loc[segment_name]
     
     card_html = f"""
     <div class="cluster-card" style="border-top-color: {get_segment_color(segment_name)};">
@@ -366,27 +560,27 @@ def create_cluster_card(segment_name, segments_df, revenue_stats):
         <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem;">
             <div>
                 <strong>Customers:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">{len(segment_data):,}</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">{int(stats['Customers']):,}</span>
             </div>
             <div>
                 <strong>Avg Recency:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">{segment_data['recency_days'].mean():.1f} days</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">{stats['recency_days_mean']:.1f} days</span>
             </div>
             <div>
                 <strong>Avg Frequency:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">{segment_data['frequency'].mean():.2f}</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">{stats['frequency_mean']:.2f}</span>
             </div>
             <div>
                 <strong>Avg Monetary:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">£{segment_data['monetary'].mean():,.0f}</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">£{stats['monetary_mean']:,.0f}</span>
             </div>
             <div>
                 <strong>Total Revenue:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">£{segment_data['monetary'].sum():,.0f}</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">£{stats['monetary_sum']:,.0f}</span>
             </div>
             <div>
                 <strong>Revenue %:</strong><br>
-                <span style="font-size: 1.5rem; color: #0066cc;">{revenue_stats.loc[segment_data['Segment_Name'].iloc[0], 'Revenue_Percent']:.1f}%</span>
+                <span style="font-size: 1.5rem; color: #0066cc;">{stats['Revenue_Percent']:.1f}%</span>
             </div>
         </div>
     </div>
@@ -413,13 +607,15 @@ def overview_page(segments_df, profiles_df):
     """Overview page with KPIs and high-level metrics"""
     st.markdown('<div class="section-header">📊 Key Performance Indicators</div>', unsafe_allow_html=True)
     
+    cube = get_segment_cube()
+    
     # Key Metrics
-    total_customers = len(segments_df)
-    total_revenue = segments_df['monetary'].sum()
-    avg_rtv = segments_df['monetary'].mean()
-    num_segments = segments_df['Segment_Name'].nunique()
-    avg_recency = segments_df['recency_days'].mean()
-    avg_frequency = segments_df['frequency'].mean()
+    total_customers = cube.customers
+    total_revenue = cube.total_revenue
+    avg_rtv = cube.overall_mean('monetary')
+    num_segments = len(cube.by_segment)
+    avg_recency = cube.overall_mean('recency_days')
+    avg_frequency = cube.overall_mean('frequency')
     
     # KPI Cards with animation
     kpi_row_one = [
@@ -452,7 +648,7 @@ def overview_page(segments_df, profiles_df):
     
     with col1:
         st.subheader("📊 Segment Distribution")
-        segment_counts = segments_df['Segment_Name'].value_counts()
+        segment_counts = cube.by_segment['Customers'].sort_values(ascending=False)
         
         # Create color mapping for pie chart
         color_map = {
@@ -476,7 +672,7 @@ def overview_page(segments_df, profiles_df):
     
     with col2:
         st.subheader("💰 Revenue Contribution")
-        revenue_stats = calculate_revenue_stats(segments_df)
+        revenue_stats = cube.revenue_stats()
         
         fig_bar = px.bar(
             x=revenue_stats.index,
@@ -492,17 +688,13 @@ def overview_page(segments_df, profiles_df):
     
     # RFM Summary Table
     st.subheader("📋 RFM Metrics Summary")
-    rfm_summary = (
-        segments_df.groupby('Segment_Name')
-        .agg(
-            Customers=('CustomerID', 'nunique'),
-            Avg_Recency=('recency_days', 'mean'),
-            Avg_Frequency=('frequency', 'mean'),
-            Avg_Monetary=('monetary', 'mean'),
-            Total_Revenue=('monetary', 'sum')
-        )
-        .reset_index()
-    )
+    rfm_summary = pd.DataFrame({
+        'Customers': cube.by_segment['Customers'],
+        'Avg_Recency': cube.by_segment['recency_days_mean'],
+        'Avg_Frequency': cube.by_segment['frequency_mean'],
+        'Avg_Monetary': cube.by_segment['monetary_mean'],
+        'Total_Revenue': cube.by_segment['monetary_sum']
+    }).rename_axis('Segment_Name').reset_index()
     
     display_summary = rfm_summary.copy()
     display_summary['Avg_Recency'] = display_summary['Avg_Recency'].round(1)
@@ -527,6 +719,10 @@ def segments_page(segments_df, rfm_df):
     """Segments page with interactive visualizations and K-Means summaries"""
     st.markdown('<div class="section-header">📊 Segments</div>', unsafe_allow_html=True)
     
+    cube = get_segment_cube()
+    segment_options = list(cube.by_segment.index)
+    cluster_options = sorted(cube.by_cluster.index.get_level_values('Cluster').unique())
+    
     # Filters
     st.subheader("🔧 Filters")
     col1, col2, col3 = st.columns(3)
@@ -534,8 +730,8 @@ def segments_page(segments_df, rfm_df):
     with col1:
         selected_segments = st.multiselect(
             "Select Segments",
-            segments_df['Segment_Name'].unique(),
-            default=segments_df['Segment_Name'].unique()
+            segment_options,
+            default=segment_options
         )
     
     with col2:
@@ -547,25 +743,21 @@ def segments_page(segments_df, rfm_df):
     with col3:
         cluster_filter = st.multiselect(
             "Select Clusters",
-            sorted(segments_df['Cluster'].unique()),
-            default=sorted(segments_df['Cluster'].unique())
+            cluster_options,
+            default=cluster_options
         )
     
-    filtered_df = segments_df[
-        (segments_df['Segment_Name'].isin(selected_segments)) &
-        (segments_df['Cluster'].isin(cluster_filter))
-    ]
+    filter_key = (tuple(selected_segments), tuple(int(c) for c in cluster_filter))
     
     st.markdown("---")
     
     # Bar chart comparison
     st.subheader("📊 Average RFM Metrics by Cluster")
     
-    cluster_avg = filtered_df.groupby('Segment_Name').agg({
-        'recency_days': 'mean',
-        'frequency': 'mean',
-        'monetary': 'mean'
-    }).round(2)
+    cluster_avg = cube.filtered(selected_segments, cluster_filter)[
+        ['recency_days_mean', 'frequency_mean', 'monetary_mean']
+    ].round(2)
+    cluster_avg.columns = ['recency_days', 'frequency', 'monetary']
     
     fig_bar = go.Figure()
     fig_bar.add_trace(go.Bar(
@@ -600,10 +792,15 @@ def segments_page(segments_df, rfm_df):
     # 3D Scatter Plot
     st.subheader("🎯 3D RFM Space Visualization")
     
-    sample_size = st.slider("Sample size for 3D plot", 1000, 10000, 5000, step=1000)
+    col_size, col_seed = st.columns([3, 1])
+    with col_size:
+        sample_size = st.slider("Sample size for 3D plot", 1000, 10000, 5000, step=1000)
+    with col_seed:
+        sample_seed = st.number_input("Sample seed", 0, 10_000, 42, help="Same seed and filters give the same sample")
+    st.caption("Sample is stratified by segment (every segment keeps at least 100 points) and thinned in dense regions.")
     
     fig_3d = px.scatter_3d(
-        filtered_df.sample(min(sample_size, len(filtered_df)) if len(filtered_df) > 0 else 0),
+        load_scatter_sample(segments_df, dataset_version('segments'), *filter_key, sample_size, int(sample_seed)),
         x='recency_days',
         y='frequency',
         z='monetary',
@@ -630,71 +827,165 @@ def segments_page(segments_df, rfm_df):
     # Boxplots
     st.subheader("📦 Value Distributions")
     
+    box_stats = load_segment_box_stats(segments_df, dataset_version('segments'), *filter_key)
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_box_recency = px.box(
-            filtered_df,
-            x='Segment_Name',
-            y='recency_days',
-            title="Recency Distribution by Segment",
-            color='Segment_Name',
-            color_discrete_map={
-                'Big Spenders': '#FF6B6B',
-                'Loyal Customers': '#4ECDC4',
-                'Recent Low Value': '#FFE66D',
-                'At-Risk': '#95A5A6'
-            }
+        fig_box_recency = grouped_box_figure(
+            box_stats['recency_days'], "Recency Distribution by Segment", "Recency (Days)"
         )
-        fig_box_recency.update_layout(showlegend=False, height=400)
+        fig_box_recency.update_layout(height=400)
         fig_box_recency = apply_light_blue_theme(fig_box_recency)
         st.plotly_chart(fig_box_recency, use_container_width=True)
     
     with col2:
-        fig_box_frequency = px.box(
-            filtered_df,
-            x='Segment_Name',
-            y='frequency',
-            title="Frequency Distribution by Segment",
-            color='Segment_Name',
-            color_discrete_map={
-                'Big Spenders': '#FF6B6B',
-                'Loyal Customers': '#4ECDC4',
-                'Recent Low Value': '#FFE66D',
-                'At-Risk': '#95A5A6'
-            }
+        fig_box_frequency = grouped_box_figure(
+            box_stats['frequency'], "Frequency Distribution by Segment", "Frequency"
         )
-        fig_box_frequency.update_layout(showlegend=False, height=400)
+        fig_box_frequency.update_layout(height=400)
         fig_box_frequency = apply_light_blue_theme(fig_box_frequency)
         st.plotly_chart(fig_box_frequency, use_container_width=True)
     
     # Monetary boxplot
-    fig_box_monetary = px.box(
-        filtered_df,
-        x='Segment_Name',
-        y=np.log1p(filtered_df['monetary']),
-        title="Monetary Distribution by Segment (Log Scale)",
-        color='Segment_Name',
-        color_discrete_map={
-            ' Big Spenders': '#FF6B6B',
-            'Loyal Customers': '#4ECDC4',
-            'Recent Low Value': '#FFE66D',
-            'At-Risk': '#95A5A6'
-        }
+    fig_box_monetary = grouped_box_figure(
+        box_stats['monetary'], "Monetary Distribution by Segment (Log Scale)", "Log(Monetary Value)"
     )
-    fig_box_monetary.update_layout(showlegend=False, height=400, yaxis_title="Log(Monetary Value)")
+    fig_box_monetary.update_layout(height=400)
     fig_box_monetary = apply_light_blue_theme(fig_box_monetary)
     st.plotly_chart(fig_box_monetary, use_container_width=True)
+    
+    # Segments by city, from the location/gender dimension table
+    dimensions = get_dimension_aggregates()
+    if dimensions is None:
+        st.info("💡 Run `python pipeline.py` to build the Segments by City breakdown.")
+    elif len(dimensions.table):
+        st.subheader("🏙️ Segments by City")
+        city_totals = dimensions.locations()
+        city_options = [city for city in city_totals.index if isinstance(city, str)]
+        selected_cities = st.multiselect(
+            "Select Cities (most transactions first)",
+            city_options,
+            default=city_options[:5],
+            key="segment_cities"
+        )
+        if selected_cities:
+            city_slice = dimensions.segment_slice(
+                locations=selected_cities,
+                segments=selected_segments,
+                clusters=[int(c) for c in cluster_filter]
+            ).reset_index()
+            
+            fig_city = px.bar(
+                city_slice,
+                x='Location',
+                y='Customers',
+                color='Segment_Name',
+                barmode='group',
+                category_orders={'Location': selected_cities},
+                title="Customers per Segment in the Selected Cities",
+                labels={'Location': 'City', 'Segment_Name': 'Segment'},
+                color_discrete_map={
+                    ' Big Spenders': '#FF6B6B',
+                    'Loyal Customers': '#4ECDC4',
+                    'Recent Low Value': '#FFE66D',
+                    'At-Risk': '#95A5A6'
+                }
+            )
+            fig_city.update_layout(height=450)
+            fig_city = apply_light_blue_theme(fig_city)
+            st.plotly_chart(fig_city, use_container_width=True)
+            
+            city_slice['Share of City Amount %'] = (
+                city_slice['Amount'] / city_slice.groupby('Location')['Amount'].transform('sum') * 100
+            ).round(1)
+            st.dataframe(city_slice.round({'Amount': 2}), use_container_width=True, hide_index=True)
+            st.caption("Customers who transact in several cities are counted in each of them.")
+    
+    # Rule-based RFM scoring
+    if rfm_df is not None:
+        st.subheader("🧮 Rule-Based RFM Segments")
+        st.caption("Scores are ranked into five bands; adjust the band boundaries (percentile of customers) to re-score.")
+        
+        boundary_cols = st.columns(len(QUINTILES))
+        boundaries = []
+        for i, (col, default) in enumerate(zip(boundary_cols, QUINTILES)):
+            with col:
+                boundaries.append(st.number_input(
+                    f"Boundary {i + 1} (%)",
+                    1, 99, int(default * 100),
+                    key=f"rfm_boundary_{i}"
+                ) / 100)
+        boundaries = tuple(sorted(boundaries))
+        
+        scored_df = rescore_rfm(rfm_df, dataset_version('rfm'), boundaries)
+        rule_summary = (
+            scored_df.groupby('segment', observed=True)
+            .agg(
+                Customers=('CustomerID', 'count'),
+                Avg_Recency=('recency_days', 'mean'),
+                Avg_Frequency=('frequency', 'mean'),
+                Avg_Monetary=('monetary', 'mean')
+            )
+            .round(2)
+            .sort_values('Customers', ascending=False)
+        )
+        
+        fig_rule = px.bar(
+            x=rule_summary.index,
+            y=rule_summary['Customers'],
+            title="Customers by Rule-Based Segment",
+            labels={'x': 'Segment', 'y': 'Customers'},
+            color=rule_summary['Customers'],
+            color_continuous_scale='Blues'
+        )
+        fig_rule.update_layout(showlegend=False, height=400)
+        fig_rule = apply_light_blue_theme(fig_rule)
+        st.plotly_chart(fig_rule, use_container_width=True)
+        st.dataframe(rule_summary, use_container_width=True)
+    
+    # KMeans model selection
+    selection_df = load_model_selection(data_version(SELECTION_PATH))
+    if selection_df is not None:
+        with st.expander("🧪 KMeans Model Selection (choice of k)"):
+            st.caption("Produced by `python clustering.py select`; silhouette is computed on a sample of customers.")
+            col1, col2 = st.columns(2)
+            with col1:
+                fig_inertia = px.line(
+                    selection_df, x='k', y='inertia', markers=True,
+                    title="Elbow (Inertia)", labels={'k': 'k', 'inertia': 'Inertia'}
+                )
+                fig_inertia.update_layout(height=350)
+                fig_inertia = apply_light_blue_theme(fig_inertia)
+                st.plotly_chart(fig_inertia, use_container_width=True)
+            with col2:
+                fig_scores = go.Figure()
+                fig_scores.add_trace(go.Scatter(
+                    x=selection_df['k'], y=selection_df['silhouette'],
+                    mode='lines+markers', name='Silhouette (higher is better)'
+                ))
+                fig_scores.add_trace(go.Scatter(
+                    x=selection_df['k'], y=selection_df['davies_bouldin'],
+                    mode='lines+markers', name='Davies–Bouldin (lower is better)'
+                ))
+                fig_scores.update_layout(height=350, title="Cluster Quality", xaxis_title="k")
+                fig_scores = apply_light_blue_theme(fig_scores)
+                st.plotly_chart(fig_scores, use_container_width=True)
+            st.dataframe(selection_df, use_container_width=True, hide_index=True)
 
-def insights_recommendations_page(segments_df):
+def insights_recommendations_page(segments_df, rfm_df=None):
     """Insights and recommendations page"""
     st.markdown('<div class="section-header">💡 Insights & Recommendations</div>', unsafe_allow_html=True)
     
-    revenue_stats = calculate_revenue_stats(segments_df)
+    cube = get_segment_cube()
+    rules_version = data_version(INSIGHT_RULES_PATH)
+    segment_insight_table = load_segment_insights(cube.by_segment, dataset_version('segments'), rules_version)
     
     # Generate insights button
     if st.button("🔄 Regenerate Insights", help="Click to regenerate all insights"):
-        st.cache_data.clear()
+        # Re-check only the segment files and recompute the statistics the insights read
+        get_registry().refresh('segments', 'rfm')
+        load_segment_cube.clear()
         st.rerun()
     
     # Segment information with marketing strategies
@@ -777,7 +1068,7 @@ def insights_recommendations_page(segments_df):
     # Display cluster cards and insights
     for segment_name, info in segments_info.items():
         # Cluster card
-        card_html = create_cluster_card(segment_name, segments_df, revenue_stats)
+        card_html = create_cluster_card(segment_name, cube)
         if card_html:
             st.markdown(card_html, unsafe_allow_html=True)
         
@@ -785,9 +1076,10 @@ def insights_recommendations_page(segments_df):
         st.markdown(f"**Description:** {info['description']}")
         
         # Auto-generated insights
-        insights = generate_cluster_insights(segment_name, segments_df, revenue_stats)
-        st.markdown("**📊 Automated Insights:**")
-        st.markdown(f'<div class="insight-box">{insights.replace(chr(10), "<br>")}</div>', unsafe_allow_html=True)
+        if segment_name in segment_insight_table.index:
+            insights = "<br>".join(message for message in segment_insight_table.loc[segment_name] if message)
+            st.markdown("**📊 Automated Insights:**")
+            st.markdown(f'<div class="insight-box">{insights}</div>', unsafe_allow_html=True)
         
         # Recommendations
         st.markdown("**💡 Strategic Recommendations:**")
@@ -805,6 +1097,19 @@ def insights_recommendations_page(segments_df):
         
         st.markdown("---")
     
+    # Rule-based RFM segments, graded by the same rule sets
+    if rfm_df is not None and 'segment' in rfm_df.columns:
+        st.subheader("🧮 Rule-Based RFM Segment Insights")
+        st.caption("Segments from R/F/M quintile scores, graded by the same insight rules as the clusters above.")
+        rfm_stats = load_rfm_segment_stats(rfm_df, dataset_version('rfm'))
+        rfm_insight_table = load_segment_insights(rfm_stats, dataset_version('rfm'), rules_version)
+        for segment_name in rfm_stats.sort_values('Customers', ascending=False).index:
+            insights = "<br>".join(message for message in rfm_insight_table.loc[segment_name] if message)
+            st.markdown(f"**{segment_name}**")
+            st.markdown(f'<div class="insight-box">{insights}</div>', unsafe_allow_html=True)
+        
+        st.markdown("---")
+    
     # Strategic summary table
     st.subheader("🎯 Overall Strategic Summary")
     strategy_table = pd.DataFrame({
@@ -822,15 +1127,8 @@ def download_center_page(segments_df, profiles_df, rfm_df):
     st.markdown("Download various reports and visualizations from your analysis.")
     
     st.subheader("📁 Raw Data")
-    raw_df = load_raw_data()
-    if raw_df is not None:
-        csv_raw = raw_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Raw Data (CSV)",
-            data=csv_raw,
-            file_name='raw_banking_data.csv',
-            mime='text/csv'
-        )
+    if RAW_DATA_PATH.exists():
+        render_export("Raw Data", "export_raw", load_raw_data, 'raw_banking_data')
     else:
         st.error("Raw data file not found. Please ensure 'Data/bank_data_C.csv' exists.")
     
@@ -838,15 +1136,12 @@ def download_center_page(segments_df, profiles_df, rfm_df):
     
     # Cluster Summary CSV
     st.subheader("📊 Cluster Summary")
-    revenue_stats = calculate_revenue_stats(segments_df)
-    cluster_summary = segments_df.groupby('Segment_Name').agg({
-        'CustomerID': 'count',
-        'recency_days': 'mean',
-        'frequency': 'mean',
-        'monetary': ['mean', 'sum']
-    }).round(2)
+    cube = get_segment_cube()
+    cluster_summary = cube.by_segment[
+        ['Customers', 'recency_days_mean', 'frequency_mean', 'monetary_mean', 'monetary_sum']
+    ].round(2)
     cluster_summary.columns = ['Customers', 'Avg_Recency', 'Avg_Frequency', 'Avg_Monetary', 'Total_Revenue']
-    cluster_summary['Revenue_Percent'] = revenue_stats['Revenue_Percent']
+    cluster_summary['Revenue_Percent'] = cube.by_segment['Revenue_Percent'].round(1)
     
     csv_summary = cluster_summary.to_csv()
     st.download_button(
@@ -858,65 +1153,36 @@ def download_center_page(segments_df, profiles_df, rfm_df):
     
     # Customer Segments CSV
     st.subheader("👥 Customer Segments")
-    csv_segments = segments_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Customer Segments (CSV)",
-        data=csv_segments,
-        file_name=f'customer_segments_{datetime.now().strftime("%Y%m%d")}.csv',
-        mime='text/csv'
+    render_export(
+        "Customer Segments", "export_segments", lambda: segments_df,
+        f'customer_segments_{datetime.now().strftime("%Y%m%d")}'
     )
     
     # RFM Scores CSV
     if rfm_df is not None:
         st.subheader("📈 RFM Scores")
-        csv_rfm = rfm_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download RFM Scores (CSV)",
-            data=csv_rfm,
-            file_name=f'rfm_scores_{datetime.now().strftime("%Y%m%d")}.csv',
-            mime='text/csv'
+        render_export(
+            "RFM Scores", "export_rfm", lambda: rfm_df,
+            f'rfm_scores_{datetime.now().strftime("%Y%m%d")}'
         )
     
     # Export summary report
     st.subheader("📄 Export Summary Report")
     st.info("💡 Summary report includes key metrics, insights, and recommendations for each segment.")
     
-    report_text = f"""
-BankTrust Retail Banking Customer Segmentation Report
-Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-EXECUTIVE SUMMARY
-=================
-Total Customers: {len(segments_df):,}
-Total Revenue: £{segments_df['monetary'].sum():,.0f}
-Average Revenue per Customer: £{segments_df['monetary'].mean():,.0f}
-Number of Segments: {segments_df['Segment_Name'].nunique()}
-
-SEGMENT ANALYSIS
-================
-"""
-    
-    for segment in segments_df['Segment_Name'].unique():
-        seg_data = segments_df[segments_df['Segment_Name'] == segment]
-        revenue_stats = calculate_revenue_stats(segments_df)
-        
-        report_text += f"""
-{segment}
----------
-Customers: {len(seg_data):,}
-Average Recency: {seg_data['recency_days'].mean():.1f} days
-Average Frequency: {seg_data['frequency'].mean():.2f}
-Average Monetary: £{seg_data['monetary'].mean():,.0f}
-Total Revenue: £{seg_data['monetary'].sum():,.0f}
-Revenue %: {revenue_stats.loc[segment, 'Revenue_Percent']:.1f}%
-
-"""
+    # Only the aggregates are cached; the report is stamped with the time it is rendered
+    rfm_stats = None
+    if rfm_df is not None and 'segment' in rfm_df.columns:
+        rfm_stats = load_rfm_segment_stats(rfm_df, dataset_version('rfm'))
+    report = build_report(get_segment_cube(), rfm_stats, generated=datetime.now())
+    report_format = st.selectbox("Report format", list(REPORT_FORMATS), key="report_format")
+    _, report_extension, report_mime = REPORT_FORMATS[report_format]
     
     st.download_button(
-        label="📥 Download Summary Report (TXT)",
-        data=report_text,
-        file_name=f'segmentation_report_{datetime.now().strftime("%Y%m%d")}.txt',
-        mime='text/plain'
+        label=f"📥 Download Summary Report ({report_format})",
+        data=render_report(report, report_format),
+        file_name=f'segmentation_report_{report.generated.strftime("%Y%m%d")}.{report_extension}',
+        mime=report_mime
     )
     
     # Share dashboard note
@@ -928,23 +1194,37 @@ def raw_data_page():
     st.markdown('<div class="section-header">📋 Raw Data Analysis</div>', unsafe_allow_html=True)
     st.markdown("**Source:** `Data/bank_data_C.csv` - Comprehensive exploratory data analysis on the raw banking transaction dataset")
     
-    raw_df = load_raw_data()
+    # Every source below is versioned by the transaction file, so it has to exist first
+    if not RAW_DATA_PATH.exists():
+        st.error("Raw data file not found. Please ensure 'Data/bank_data_C.csv' exists.")
+        return
     
-    if raw_df is not None:
+    # Streamed aggregates cover files too large to load; otherwise read the ingest-time artefacts
+    aggregates = load_streamed_aggregates(data_version(RAW_AGGREGATES_PATH, RAW_DATA_PATH))
+    if aggregates is not None:
+        profile, rollups = aggregates.profile(), aggregates.rollups
+        gender_counts = pd.Series(aggregates.gender_counts, dtype='int64').sort_values(ascending=False)
+        location_counts = aggregates.location_sketch.top(15)
+        st.caption("Rendered from streamed aggregates in `Data/processed/raw_aggregates.json`")
+    else:
+        profile = load_raw_artefact('profile', dataset_version('raw'))
+        rollups = load_raw_artefact('rollups', dataset_version('raw'))
+        demographics = load_raw_artefact('demographics', dataset_version('raw'))
+        gender_counts = demographics.genders if demographics is not None else pd.Series(dtype='int64')
+        location_counts = demographics.top_locations(15) if demographics is not None else pd.Series(dtype='int64')
+    
+    if profile is not None:
         # Dataset Overview
         st.subheader("📊 Dataset Overview")
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Records", f"{len(raw_df):,}")
+            st.metric("Total Records", f"{profile.rows:,}")
         with col2:
-            customer_count = raw_df['CustomerID'].nunique() if 'CustomerID' in raw_df.columns else 0
-            st.metric("Total Customers", f"{customer_count:,}")
+            st.metric("Total Customers", f"{profile.customers:,}")
         with col3:
-            total_amount = raw_df['TransactionAmount'].sum() if 'TransactionAmount' in raw_df.columns else 0
-            st.metric("Total Transaction Amount", f"£{total_amount:,.0f}")
+            st.metric("Total Transaction Amount", f"£{profile.total_amount:,.0f}")
         with col4:
-            avg_amount = raw_df['TransactionAmount'].mean() if 'TransactionAmount' in raw_df.columns else 0
-            st.metric("Avg Transaction Amount", f"£{avg_amount:,.2f}")
+            st.metric("Avg Transaction Amount", f"£{profile.mean_amount:,.2f}")
         
         st.markdown("---")
         
@@ -952,19 +1232,22 @@ def raw_data_page():
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("📋 Data Structure")
-            st.write(f"**Shape:** {raw_df.shape[0]:,} rows × {raw_df.shape[1]} columns")
+            st.write(f"**Shape:** {profile.rows:,} rows × {len(profile.columns)} columns")
             st.write("**Columns:**")
-            for col in raw_df.columns:
-                dtype = raw_df[col].dtype
-                st.write(f"- {col} ({dtype})")
+            for col, dtype in profile.columns.items():
+                distinct = profile.distinct.get(col)
+                st.write(f"- {col} ({dtype})" + (f" — {distinct:,} distinct" if distinct is not None else ""))
+            if profile.memory is not None:
+                with st.expander("💾 Memory Footprint"):
+                    st.dataframe(profile.memory, use_container_width=True, hide_index=True)
         
         with col2:
             st.subheader("🔍 Missing Values")
-            missing_data = raw_df.isnull().sum()
+            missing_data = pd.Series(profile.missing, dtype='int64')
             missing_df = pd.DataFrame({
                 'Column': missing_data.index,
                 'Missing Count': missing_data.values,
-                'Missing %': (missing_data.values / len(raw_df) * 100).round(2)
+                'Missing %': (missing_data.values / max(profile.rows, 1) * 100).round(2)
             })
             missing_df = missing_df[missing_df['Missing Count'] > 0]
             if len(missing_df) > 0:
@@ -976,74 +1259,64 @@ def raw_data_page():
         
         # Summary Statistics
         st.subheader("📈 Summary Statistics")
-        numeric_cols = raw_df.select_dtypes(include=[np.number]).columns.tolist()
-        if len(numeric_cols) > 0:
-            st.dataframe(raw_df[numeric_cols].describe(), use_container_width=True)
+        if len(profile.describe.columns) > 0:
+            st.dataframe(profile.describe, use_container_width=True)
         
         st.markdown("---")
         
         # Sample Data
         st.subheader("👀 Sample Data")
         num_rows = st.slider("Number of rows to display", 5, 100, 10, key="raw_sample")
-        st.dataframe(raw_df.head(num_rows), use_container_width=True)
+        st.dataframe(profile.head.head(num_rows), use_container_width=True)
         
         st.markdown("---")
         
         # Transaction Analysis
-        if 'TransactionAmount' in raw_df.columns:
+        amount_stats = profile.amount
+        if amount_stats is not None:
             st.subheader("💰 Transaction Amount Analysis")
             
             col1, col2 = st.columns(2)
             
             with col1:
-                fig_hist = px.histogram(
-                    raw_df.sample(min(50000, len(raw_df))),
-                    x='TransactionAmount',
-                    nbins=50,
-                    title="Transaction Amount Distribution",
-                    labels={'TransactionAmount': 'Amount (£)', 'count': 'Frequency'}
-                )
+                fig_hist = histogram_figure(amount_stats, "Transaction Amount Distribution", "Amount (£)",
+                                            log_x=not profile.exact)
                 fig_hist.update_layout(height=400)
                 fig_hist = apply_light_blue_theme(fig_hist)
                 st.plotly_chart(fig_hist, use_container_width=True)
             
             with col2:
-                fig_box = px.box(
-                    raw_df.sample(min(50000, len(raw_df))),
-                    y='TransactionAmount',
-                    title="Transaction Amount Box Plot",
-                    labels={'TransactionAmount': 'Amount (£)'}
-                )
+                fig_box = box_figure(amount_stats, "Transaction Amount Box Plot", "Amount (£)")
                 fig_box.update_layout(height=400)
                 fig_box = apply_light_blue_theme(fig_box)
                 st.plotly_chart(fig_box, use_container_width=True)
+                approximate = "" if profile.exact else "about "
+                st.caption(
+                    f"{approximate}{amount_stats.outliers:,} outliers beyond the whiskers "
+                    f"({amount_stats.outliers_low:,} low, {amount_stats.outliers_high:,} high) "
+                    f"across all {amount_stats.count:,} transactions"
+                )
             
             # Transaction statistics by customer
             st.markdown("#### Transaction Statistics by Customer")
-            customer_stats = raw_df.groupby('CustomerID').agg({
-                'TransactionAmount': ['sum', 'mean', 'count'],
-            }).round(2)
-            customer_stats.columns = ['Total Amount', 'Avg Amount', 'Transaction Count']
-            customer_stats = customer_stats.sort_values('Total Amount', ascending=False)
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Top Customer Total", f"£{customer_stats['Total Amount'].max():,.0f}")
+                st.metric("Top Customer Total", f"£{profile.top_customer_total:,.0f}")
             with col2:
-                st.metric("Avg Transactions per Customer", f"{customer_stats['Transaction Count'].mean():.1f}")
+                st.metric("Avg Transactions per Customer", f"{profile.avg_transactions_per_customer:.1f}")
             with col3:
-                st.metric("Median Transaction Amount", f"£{raw_df['TransactionAmount'].median():,.2f}")
+                st.metric("Median Transaction Amount", f"£{amount_stats.median:,.2f}")
         
         st.markdown("---")
         
         # Customer Demographics
-        if 'CustGender' in raw_df.columns:
+        if len(gender_counts):
             st.subheader("👥 Customer Demographics")
             
             col1, col2 = st.columns(2)
             
             with col1:
-                gender_counts = raw_df['CustGender'].value_counts()
                 fig_gender = px.pie(
                     values=gender_counts.values,
                     names=gender_counts.index,
@@ -1054,8 +1327,7 @@ def raw_data_page():
                 st.plotly_chart(fig_gender, use_container_width=True)
             
             with col2:
-                if 'CustLocation' in raw_df.columns:
-                    location_counts = raw_df['CustLocation'].value_counts().head(15)
+                if len(location_counts):
                     fig_location = px.bar(
                         x=location_counts.index,
                         y=location_counts.values,
@@ -1067,55 +1339,82 @@ def raw_data_page():
                     fig_location.update_layout(showlegend=False, height=400, xaxis_tickangle=-45)
                     fig_location = apply_light_blue_theme(fig_location)
                     st.plotly_chart(fig_location, use_container_width=True)
+                    if aggregates is not None and aggregates.location_sketch.error:
+                        st.caption(
+                            f"City names are normalised. Counts come from a heavy-hitters sketch and may be "
+                            f"up to {aggregates.location_sketch.error:,} below the true count."
+                        )
+                    else:
+                        st.caption("City names are normalised (trimmed, title case, punctuation removed).")
         
         st.markdown("---")
         
         # Time-based Analysis
-        if 'TransactionDate' in raw_df.columns:
+        if rollups is not None and len(rollups.daily):
             st.subheader("📅 Time-based Analysis")
             
-            try:
-                time_df = raw_df.copy()
-                time_df['TransactionDate'] = pd.to_datetime(time_df['TransactionDate'], errors='coerce')
-                time_df = time_df.dropna(subset=['TransactionDate'])
-                time_df['YearMonth'] = time_df['TransactionDate'].dt.to_period('M').astype(str)
-                time_df['Year'] = time_df['TransactionDate'].dt.year
-                time_df['DayOfWeek'] = time_df['TransactionDate'].dt.day_name()
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    monthly_transactions = time_df.groupby('YearMonth').size().sort_index()
-                    fig_time = px.line(
-                        x=monthly_transactions.index,
-                        y=monthly_transactions.values,
-                        title="Transaction Volume Over Time",
-                        labels={'x': 'Month', 'y': 'Number of Transactions'},
-                        markers=True
+            col_grain, col_range = st.columns([1, 2])
+            with col_grain:
+                granularity = st.selectbox(
+                    "Granularity", ["Monthly", "Weekday", "Daily", "Hourly"], key="raw_time_granularity"
+                )
+            start, end = None, None
+            if granularity in ("Daily", "Hourly"):
+                all_days = rollups.days().index
+                first_day, last_day = all_days.min().date(), all_days.max().date()
+                with col_range:
+                    date_range = st.date_input(
+                        "Date range", (first_day, last_day),
+                        min_value=first_day, max_value=last_day, key="raw_time_range"
                     )
-                    fig_time.update_layout(height=400)
-                    fig_time = apply_light_blue_theme(fig_time)
-                    st.plotly_chart(fig_time, use_container_width=True)
-                
-                with col2:
-                    if 'TransactionAmount' in time_df.columns:
-                        monthly_revenue = time_df.groupby('YearMonth')['TransactionAmount'].sum().sort_index()
-                        fig_revenue = px.line(
-                            x=monthly_revenue.index,
-                            y=monthly_revenue.values,
-                            title="Revenue Over Time",
-                            labels={'x': 'Month', 'y': 'Revenue (£)'},
-                            markers=True
-                        )
-                        fig_revenue.update_layout(height=400)
-                        fig_revenue = apply_light_blue_theme(fig_revenue)
-                        st.plotly_chart(fig_revenue, use_container_width=True)
-            except Exception as e:
-                st.warning(f"Could not perform time-based analysis: {e}")
+                if isinstance(date_range, (tuple, list)) and len(date_range) == 2:
+                    start, end = (int(day.strftime('%Y%m%d')) for day in date_range)
+            
+            if granularity == "Monthly":
+                series, x_label = rollups.monthly(), 'Month'
+            elif granularity == "Weekday":
+                series, x_label = rollups.weekday(), 'Weekday'
+            elif granularity == "Daily":
+                series, x_label = rollups.days(start, end), 'Date'
+            else:
+                series, x_label = rollups.hours(start, end), 'Hour'
+            chart = px.bar if granularity == "Weekday" else px.line
+            chart_options = {} if granularity == "Weekday" else {'markers': granularity != "Hourly"}
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig_time = chart(
+                    x=series.index,
+                    y=series['Transactions'].values,
+                    title="Transaction Volume Over Time",
+                    labels={'x': x_label, 'y': 'Number of Transactions'},
+                    **chart_options
+                )
+                fig_time.update_layout(height=400)
+                fig_time = apply_light_blue_theme(fig_time)
+                st.plotly_chart(fig_time, use_container_width=True)
+            
+            with col2:
+                fig_revenue = chart(
+                    x=series.index,
+                    y=series['Revenue'].values,
+                    title="Revenue Over Time",
+                    labels={'x': x_label, 'y': 'Revenue (£)'},
+                    **chart_options
+                )
+                fig_revenue.update_layout(height=400)
+                fig_revenue = apply_light_blue_theme(fig_revenue)
+                st.plotly_chart(fig_revenue, use_container_width=True)
+            
+            with st.expander(f"📋 {granularity} Rollup Table"):
+                st.dataframe(series, use_container_width=True)
+                if not rollups.exact:
+                    st.caption("Distinct customer counts are HyperLogLog estimates (about ±2%).")
     else:
         st.error("Raw data file not found. Please ensure 'Data/bank_data_C.csv' exists.")
 
-def customer_explorer_page(segments_df):
+def customer_explorer_page():
     """Customer explorer page with search functionality"""
     st.markdown('<div class="section-header">🔍 Customer Explorer</div>', unsafe_allow_html=True)
     
@@ -1127,12 +1426,17 @@ def customer_explorer_page(segments_df):
         help="Type a Customer ID to find specific customer information"
     )
     
+    store = get_feature_store()
+    customer_index = get_customer_index()
+    match_position = None
+    
     # If CustomerID is provided, show that customer's details
     if search_customer_id:
         search_customer_id = search_customer_id.strip().upper()
-        customer_data = segments_df[segments_df['CustomerID'].str.upper() == search_customer_id]
+        match_position = customer_index.lookup(search_customer_id)
         
-        if len(customer_data) > 0:
+        if match_position is not None:
+            customer_data = store.rows([match_position])
             st.success(f"✅ Found customer: {search_customer_id}")
             
             # Display customer details
@@ -1150,9 +1454,9 @@ def customer_explorer_page(segments_df):
             with col1:
                 st.metric("Monetary Value", f"£{customer_data.iloc[0]['monetary']:,.2f}")
             with col2:
-                st.metric("Cluster", customer_data.iloc[0]['Cluster'])
+                st.metric("Cluster", int(customer_data.iloc[0]['Cluster']))
             with col3:
-                monetary_percentile = (segments_df['monetary'] <= customer_data.iloc[0]['monetary']).sum() / len(segments_df) * 100
+                monetary_percentile = customer_index.monetary_percentile(customer_data.iloc[0]['monetary'])
                 st.metric("Monetary Percentile", f"{monetary_percentile:.1f}%")
             
             # Detailed customer information
@@ -1169,11 +1473,12 @@ def customer_explorer_page(segments_df):
             # Comparison with segment averages
             st.markdown("#### 📊 Comparison with Segment Averages")
             segment_name = customer_data.iloc[0]['Segment_Name']
-            segment_avg = segments_df[segments_df['Segment_Name'] == segment_name].agg({
-                'recency_days': 'mean',
-                'frequency': 'mean',
-                'monetary': 'mean'
-            })
+            segment_stats = get_segment_cube().by_segment.loc[segment_name]
+            segment_avg = {
+                'recency_days': segment_stats['recency_days_mean'],
+                'frequency': segment_stats['frequency_mean'],
+                'monetary': segment_stats['monetary_mean']
+            }
             
             comparison_data = {
                 'Metric': ['Recency (Days)', 'Frequency', 'Monetary Value (£)'],
@@ -1205,25 +1510,30 @@ def customer_explorer_page(segments_df):
     st.markdown("---")
     st.subheader("🔧 Filter Customers")
     
+    cube = get_segment_cube()
+    segment_options = list(cube.by_segment.index)
+    recency_limit = int(cube.by_segment['recency_days_max'].max())
+    monetary_limit = float(cube.by_segment['monetary_max'].max())
+    
     # Filters
     col1, col2, col3 = st.columns(3)
     with col1:
         selected_segments = st.multiselect(
             "Select Segments",
-            segments_df['Segment_Name'].unique(),
-            default=segments_df['Segment_Name'].unique()
+            segment_options,
+            default=segment_options
         )
     with col2:
         min_recency = st.slider(
             "Min Recency (Days)",
-            0, int(segments_df['recency_days'].max()),
+            0, recency_limit,
             0
         )
     with col3:
         max_recency = st.slider(
             "Max Recency (Days)",
-            0, int(segments_df['recency_days'].max()),
-            int(segments_df['recency_days'].max())
+            0, recency_limit,
+            recency_limit
         )
     
     col1, col2 = st.columns(2)
@@ -1231,35 +1541,31 @@ def customer_explorer_page(segments_df):
         min_monetary = st.number_input(
             "Min Monetary (£)",
             0.0,
-            float(segments_df['monetary'].max()),
+            monetary_limit,
             0.0
         )
     with col2:
         max_monetary = st.number_input(
             "Max Monetary (£)",
             0.0,
-            float(segments_df['monetary'].max()),
-            float(segments_df['monetary'].max())
+            monetary_limit,
+            monetary_limit
         )
     
     # Apply filters
-    if not search_customer_id or len(segments_df[segments_df['CustomerID'].str.upper() == search_customer_id]) == 0:
-        filtered_df = segments_df[
-            (segments_df['Segment_Name'].isin(selected_segments)) &
-            (segments_df['recency_days'] >= min_recency) &
-            (segments_df['recency_days'] <= max_recency) &
-            (segments_df['monetary'] >= min_monetary) &
-            (segments_df['monetary'] <= max_monetary)
-        ]
+    if not search_customer_id or match_position is None:
+        positions = get_range_index().query(
+            selected_segments, min_recency, max_recency, min_monetary, max_monetary
+        )
         
-        if len(filtered_df) > 0:
-            total_revenue = filtered_df['monetary'].sum()
-            avg_recency_filtered = filtered_df['recency_days'].mean()
-            avg_frequency_filtered = filtered_df['frequency'].mean()
+        if len(positions) > 0:
+            total_revenue = store['monetary'][positions].sum()
+            avg_recency_filtered = store['recency_days'][positions].mean()
+            avg_frequency_filtered = store['frequency'][positions].mean()
             
             col_a, col_b, col_c, col_d = st.columns(4)
             with col_a:
-                st.metric("Filtered Customers", f"{len(filtered_df):,}")
+                st.metric("Filtered Customers", f"{len(positions):,}")
             with col_b:
                 st.metric("Total Revenue", f"£{total_revenue:,.0f}")
             with col_c:
@@ -1268,29 +1574,58 @@ def customer_explorer_page(segments_df):
                 st.metric("Avg Frequency", f"{avg_frequency_filtered:.2f}")
             
             st.subheader("📋 Customer Data")
-            display_df = filtered_df[['CustomerID', 'Segment_Name', 'recency_days', 
-                                     'frequency', 'monetary', 'Cluster']].copy()
-            display_df.columns = ['Customer ID', 'Segment', 'Recency (Days)', 
-                                 'Frequency', 'Monetary Value (£)', 'Cluster']
-            display_df['Monetary Value (£)'] = display_df['Monetary Value (£)'].apply(
-                lambda x: f"£{x:,.2f}"
-            )
-            display_df['Recency (Days)'] = display_df['Recency (Days)'].apply(
-                lambda x: f"{x:.0f}"
-            )
-            display_df['Frequency'] = display_df['Frequency'].apply(
-                lambda x: f"{x:.2f}"
+            table_columns = {
+                'CustomerID': 'Customer ID',
+                'Segment_Name': 'Segment',
+                'recency_days': 'Recency (Days)',
+                'frequency': 'Frequency',
+                'monetary': 'Monetary Value (£)',
+                'Cluster': 'Cluster'
+            }
+            sort_options = {label: column for column, label in table_columns.items()}
+            
+            col_sort, col_order, col_size, col_page = st.columns(4)
+            with col_sort:
+                sort_label = st.selectbox("Sort by", list(sort_options), index=4, key="explorer_sort")
+            with col_order:
+                sort_order = st.selectbox("Order", ["Descending", "Ascending"], key="explorer_order")
+            with col_size:
+                page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=2, key="explorer_page_size")
+            total_pages = max(1, -(-len(positions) // page_size))
+            filter_signature = (tuple(selected_segments), min_recency, max_recency, min_monetary, max_monetary)
+            # Back to the first page when the filters or page size change, and never past the last page
+            if st.session_state.get("explorer_view") != (filter_signature, page_size):
+                st.session_state["explorer_view"] = (filter_signature, page_size)
+                st.session_state["explorer_page"] = 1
+            elif st.session_state.get("explorer_page", 1) > total_pages:
+                st.session_state["explorer_page"] = total_pages
+            with col_page:
+                page = st.number_input("Page", 1, total_pages, key="explorer_page")
+            
+            page_positions = paginate(
+                positions,
+                store.sort_key(sort_options[sort_label]),
+                page=page,
+                page_size=page_size,
+                ascending=(sort_order == "Ascending")
             )
+            display_df = store.rows(page_positions)[list(table_columns)].rename(columns=table_columns)
+            display_df['Monetary Value (£)'] = display_df['Monetary Value (£)'].map('£{:,.2f}'.format)
+            display_df['Recency (Days)'] = display_df['Recency (Days)'].map('{:.0f}'.format)
+            display_df['Frequency'] = display_df['Frequency'].map('{:.2f}'.format)
             
-            st.dataframe(display_df, use_container_width=True)
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            first_row = (page - 1) * page_size + 1
+            st.caption(
+                f"Showing rows {first_row:,}–{first_row + len(page_positions) - 1:,} "
+                f"of {len(positions):,} matching customers (page {page} of {total_pages})"
+            )
             
             # Download option
-            csv = filtered_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Filtered Data",
-                data=csv,
-                file_name='filtered_customers.csv',
-                mime='text/csv'
+            render_export(
+                "Filtered Data", "export_filtered", lambda: store.rows(positions),
+                'filtered_customers',
+                signature=filter_signature
             )
         else:
             st.info("No customers match the selected filters.")
@@ -1301,46 +1636,59 @@ def customer_explorer_page(segments_df):
 # MAIN APPLICATION
 # ============================================================================
 
-def main():
-    # Load data
+PAGES = [
+    "📊 Overview", 
+    "📊 Segments",
+    "🔍 Customer Explorer",
+    "💡 Insights & Recommendations",
+    "📋 Raw Data",
+    "📥 Download Center"
+]
+
+def render_page(page):
+    """Render one page, loading only the data it needs.
+
+    The Customer Explorer reads the memory-mapped feature store and the Raw Data
+    page its own aggregates, so neither loads the segment frames. The other
+    pages still read the frames through ``load_data()``, and each process keeps
+    one copy of them in its registry once one of those pages has been shown.
+    """
+    if page == "🔍 Customer Explorer":
+        customer_explorer_page()
+        return
+    if page == "📋 Raw Data":
+        raw_data_page()
+        return
+
     segments_df, profiles_df, rfm_df = load_data()
-    
     if segments_df is None:
         st.error("Please ensure data files are in the correct location.")
         return
+    if page == "📊 Overview":
+        overview_page(segments_df, profiles_df)
+    elif page == "📊 Segments":
+        segments_page(segments_df, rfm_df)
+    elif page == "💡 Insights & Recommendations":
+        insights_recommendations_page(segments_df, rfm_df)
+    elif page == "📥 Download Center":
+        download_center_page(segments_df, profiles_df, rfm_df)
+
+def main():
+    if not SEGMENTS_PATH.exists():
+        st.error("Please ensure data files are in the correct location.")
+        return
     
     # Sidebar Navigation
     st.sidebar.title("🏦 BankTrust")
     
-    page = st.sidebar.radio(
-        "Choose a page",
-        [
-            "📊 Overview", 
-            "📊 Segments",
-            "🔍 Customer Explorer",
-            "💡 Insights & Recommendations",
-            "📋 Raw Data",
-            "📥 Download Center"
-        ]
-    )
+    page = st.sidebar.radio("Choose a page", PAGES)
     
     # Main header
     st.markdown('<h1 class="main-header">BankTrust Retail Banking Customer Segmentation Dashboard</h1>', 
                 unsafe_allow_html=True)
     
     # Page routing
-    if page == "📊 Overview":
-        overview_page(segments_df, profiles_df)
-    elif page == "📊 Segments":
-        segments_page(segments_df, rfm_df)
-    elif page == "🔍 Customer Explorer":
-        customer_explorer_page(segments_df)
-    elif page == "💡 Insights & Recommendations":
-        insights_recommendations_page(segments_df)
-    elif page == "📋 Raw Data":
-        raw_data_page()
-    elif page == "📥 Download Center":
-        download_center_page(segments_df, profiles_df, rfm_df)
+    render_page(page)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,500 @@
+"""Benchmarks of the dashboard page render paths at production data scale.
+
+Synthetic datasets in the shape of ``bank_data_C.csv`` are generated at each
+requested size, refreshed with ``pipeline.py`` into the same processed
+artefacts the dashboard reads (segments, profiles, RFM scores, dimension
+table, columnar cache), and every page function of ``app.py`` is rendered
+headlessly with Streamlit replaced by a stub. Widgets return their defaults,
+output elements do nothing, and ``st.cache_data`` / ``st.cache_resource`` keep
+Streamlit's semantics: arguments starting with ``_`` are not part of the key
+and ``cache_data`` hands out an unpickled copy on every call.
+
+The dataset is prepared and each page measured in its own fresh process, so
+peak RSS belongs to that page:
+
+- ``cold_s``: first render with empty in-process caches, including reading
+  the data the page loads
+- ``warm_s``: the rerun that follows, served from the caches
+- ``peak_rss_mb``: peak resident set size of the process after both renders
+  (``VmHWM``, which starts afresh in the spawned interpreter)
+- ``traced_peak_mb`` / ``traced_live_blocks``: a second cold render under
+  ``tracemalloc``: peak traced memory, and the blocks allocated during the
+  render that are still live after it. The total number of allocations
+  (including blocks freed before the render ends) is not measured; neither
+  ``tracemalloc`` nor ``sys.getallocatedblocks()`` reports it.
+
+Rows are appended to ``Data/benchmarks/results.csv`` with the git revision and
+an optional label, so runs before and after a change can be compared.
+
+    python benchmark.py run --rows 100000 1000000 --label before
+    python benchmark.py run --rows 100000 1000000 --label after
+    python benchmark.py compare before after
+"""
+import argparse
+import functools
+import inspect
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parent
+BENCHMARK_DIR = Path('Data/benchmarks')
+RESULTS_PATH = BENCHMARK_DIR / 'results.csv'
+DATASET_ROWS = (100_000, 1_000_000, 10_000_000)
+CHUNK_ROWS = 1_000_000
+CUSTOMERS_PER_ROW = 0.85  # about 880k customers for the ~1M-row source file
+TRAIN_CUSTOMERS = 50_000
+
+FIRST_DAY, LAST_DAY = np.datetime64('2016-08-01'), np.datetime64('2016-10-21')
+CITIES = ['MUMBAI', 'NEW DELHI', 'BANGALORE', 'GURGAON', 'DELHI', 'NOIDA', 'CHENNAI', 'PUNE', 'HYDERABAD',
+          'THANE', 'KOLKATA', 'AHMEDABAD', 'NAVI MUMBAI', 'JAIPUR', 'CHANDIGARH', 'LUCKNOW', 'INDORE']
+N_LOCATIONS = 9000
+GENDERS = np.array(['M', 'F', 'T'], dtype=object)
+UNKNOWN_DOB = np.datetime64('1800-01-01').astype(np.int64)  # written as 1/1/1800, as in the source file
+RAW_COLUMNS = ['TransactionID', 'CustomerID', 'CustomerDOB', 'CustGender', 'CustLocation',
+               'CustAccountBalance', 'TransactionDate', 'TransactionTime', 'TransactionAmount (INR)']
+
+# Page name -> sidebar label passed to ``app.render_page``
+PAGES = {
+    'overview': "📊 Overview",
+    'segments': "📊 Segments",
+    'customer_explorer': "🔍 Customer Explorer",
+    'insights': "💡 Insights & Recommendations",
+    'raw_data': "📋 Raw Data",
+    'download_center': "📥 Download Center",
+}
+RESULT_COLUMNS = ['recorded_at', 'revision', 'label', 'rows', 'page', 'cold_s', 'warm_s',
+                  'peak_rss_mb', 'traced_peak_mb', 'traced_live_blocks']
+
+
+# ============================================================================
+# STREAMLIT STUB
+# ============================================================================
+
+class PageStopped(Exception):
+    """Raised by the stub's ``st.stop()`` and ``st.rerun()``"""
+
+
+class SessionState(dict):
+    """``st.session_state``: a dict that also allows attribute access"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+class StreamlitStub(types.ModuleType):
+    """Headless stand-in for the ``streamlit`` module.
+
+    Layout calls return the stub itself as a container, widgets return their
+    default value, and any other element is a no-op.
+    """
+
+    def __init__(self):
+        super().__init__('streamlit')
+        self.session_state = SessionState()
+        self.sidebar = self
+        self.caches = []
+        self.cache_data = self._cache_decorator(copy=True)
+        self.cache_resource = self._cache_decorator(copy=False)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self._element
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def _element(self, *args, **kwargs):
+        return self
+
+    def _cache_decorator(self, copy):
+        def decorator(func=None, **options):
+            if func is None:
+                return lambda f: decorator(f, **options)
+            cache = {}
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = pickle.dumps([(name, value) for name, value in bound.arguments.items()
+                                    if not name.startswith('_')])
+                if key not in cache:
+                    value = func(*args, **kwargs)
+                    cache[key] = pickle.dumps(value) if copy else value
+                return pickle.loads(cache[key]) if copy else cache[key]
+
+            wrapper.clear = cache.clear
+            self.caches.append(cache)
+            return wrapper
+        return decorator
+
+    def clear_caches(self):
+        for cache in self.caches:
+            cache.clear()
+
+    def columns(self, spec, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def tabs(self, labels):
+        return [self] * len(labels)
+
+    def stop(self):
+        raise PageStopped()
+
+    def rerun(self):
+        raise PageStopped()
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def download_button(self, *args, **kwargs):
+        return False
+
+    def checkbox(self, label, value=False, **kwargs):
+        return value
+
+    toggle = checkbox
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        return options[index] if options and index is not None else None
+
+    radio = selectbox
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return [] if default is None else list(default)
+
+    def slider(self, label, min_value=None, max_value=None, value=None, step=None, **kwargs):
+        return min_value if value is None else value
+
+    number_input = slider
+
+    def text_input(self, label, value='', **kwargs):
+        return value
+
+    text_area = text_input
+
+    def date_input(self, label, value=None, **kwargs):
+        return value
+
+    def file_uploader(self, *args, **kwargs):
+        return None
+
+
+def install_streamlit_stub():
+    """Replace ``streamlit`` in ``sys.modules`` with a fresh stub and return it"""
+    stub = StreamlitStub()
+    sys.modules['streamlit'] = stub
+    return stub
+
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+def _format_days(days, date_format='%d/%m/%y'):
+    """Format day numbers through their distinct values"""
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    labels = pd.to_datetime(unique_days, unit='D').strftime(date_format).to_numpy(dtype=object)
+    return labels[inverse]
+
+
+def _location_pool(rng):
+    """Location spellings (with messy variants) and the probability of each"""
+    names = CITIES + [f"TOWN {i}" for i in range(N_LOCATIONS - len(CITIES))]
+    weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    variants = [[name, name.title(), f" {name} ", f"{name.lower()}."] for name in names]
+    variant_weights = np.array([0.9, 0.05, 0.03, 0.02])
+    pool = np.array([spelling for spellings in variants for spelling in spellings], dtype=object)
+    probabilities = np.outer(weights / weights.sum(), variant_weights).ravel()
+    return pool, probabilities
+
+
+class SyntheticCustomers:
+    """Per-customer attributes shared by every transaction of that customer"""
+
+    def __init__(self, n_customers, rng):
+        self.n = n_customers
+        self.first_rows = rng.permutation(n_customers)
+        self.gender = rng.choice(3, size=n_customers, p=[0.73, 0.269, 0.001]).astype(np.int8)
+        self.locations, probabilities = _location_pool(rng)
+        self.location = rng.choice(len(self.locations), size=n_customers, p=probabilities).astype(np.int32)
+        first_birth, last_birth = np.datetime64('1950-01-01').astype(np.int64), np.datetime64('2000-12-31').astype(np.int64)
+        self.dob = rng.integers(first_birth, last_birth, size=n_customers)
+        self.dob[rng.random(n_customers) < 0.05] = UNKNOWN_DOB
+        self.balance = np.round(rng.lognormal(10.5, 1.8, size=n_customers), 2)
+        self.balance[rng.random(n_customers) < 0.002] = np.nan
+
+
+def synthetic_chunk(customers, start, stop, rng):
+    """Transactions ``start`` to ``stop`` in the raw ``bank_data_C.csv`` format, plus parsed dates"""
+    positions = np.arange(start, stop)
+    first = positions < customers.n
+    customer = np.where(first, customers.first_rows[np.minimum(positions, customers.n - 1)],
+                        rng.integers(0, customers.n, size=len(positions)))
+    days = rng.integers(FIRST_DAY.astype(np.int64), LAST_DAY.astype(np.int64) + 1, size=len(positions))
+    seconds = rng.integers(0, 86_400, size=len(positions))
+    gender = GENDERS[customers.gender[customer]]
+    gender[rng.random(len(positions)) < 0.001] = None
+    location = customers.locations[customers.location[customer]]
+    location[rng.random(len(positions)) < 0.0001] = None
+    dob = customers.dob[customer]
+    dob_labels = _format_days(dob)
+    dob_labels[dob == UNKNOWN_DOB] = '1/1/1800'
+    raw = pd.DataFrame({
+        'TransactionID': 'T' + pd.Series(positions + 1).astype(str),
+        'CustomerID': 'C' + pd.Series(customer + 1_000_000).astype(str),
+        'CustomerDOB': dob_labels,
+        'CustGender': gender,
+        'CustLocation': location,
+        'CustAccountBalance': customers.balance[customer],
+        'TransactionDate': _format_days(days),
+        'TransactionTime': seconds // 3600 * 10_000 + seconds // 60 % 60 * 100 + seconds % 60,
+        'TransactionAmount (INR)': np.round(rng.lognormal(6.2, 1.6, size=len(positions)), 2),
+    }, columns=RAW_COLUMNS)
+    parsed = pd.DataFrame({
+        'CustomerID': raw['CustomerID'],
+        'TransactionDate': days.astype('datetime64[D]').astype('datetime64[ns]'),
+        'TransactionAmount': raw['TransactionAmount (INR)'],
+    })
+    return raw, parsed
+
+
+@contextmanager
+def working_directory(path):
+    previous = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def prepare_dataset(rows, benchmark_dir=BENCHMARK_DIR, seed=42, n_jobs=None, regenerate=False):
+    """Generate a synthetic dataset of ``rows`` transactions and refresh its dashboard artefacts.
+
+    Returns the dataset directory, laid out like the repository (``Data/...``)
+    so the dashboard's relative paths resolve inside it.
+    """
+    from clustering import fit_model, save_model
+    from data_cache import RAW_DATA_PATH, atomic_write
+    from pipeline import refresh
+    from rfm import RFMEngine
+
+    dataset_dir = (Path(benchmark_dir) / f"rows_{rows}").resolve()
+    marker = dataset_dir / 'dataset.json'
+    spec = {'rows': rows, 'seed': seed}
+    if not regenerate and marker.exists() and json.loads(marker.read_text()) == spec:
+        return dataset_dir
+
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    with working_directory(dataset_dir):
+        rng = np.random.default_rng(seed)
+        customers = SyntheticCustomers(max(1, int(rows * CUSTOMERS_PER_ROW)), rng)
+        train_engine = RFMEngine()
+
+        def write_source(tmp_path):
+            for start in range(0, rows, CHUNK_ROWS):
+                raw, parsed = synthetic_chunk(customers, start, min(start + CHUNK_ROWS, rows), rng)
+                raw.to_csv(tmp_path, mode='a', header=start == 0, index=False)
+                if not len(train_engine.state):
+                    train_engine.fold(parsed)
+
+        atomic_write(RAW_DATA_PATH, write_source)
+
+        # Train on a sample of the first chunk's customers; refresh then scores everyone
+        train_rfm = train_engine.rfm()
+        model = fit_model(train_rfm.sample(min(len(train_rfm), TRAIN_CUSTOMERS), random_state=seed))
+        save_model(model)
+        refresh(n_jobs=n_jobs)
+
+    marker.write_text(json.dumps(spec))
+    return dataset_dir
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB.
+
+    ``ru_maxrss`` carries over the parent's peak across fork and exec, so the
+    per-process ``VmHWM`` is read where ``/proc`` has it.
+    """
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _import_app(dataset_dir):
+    os.chdir(dataset_dir)
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    stub = install_streamlit_stub()
+    import app
+    return app, stub
+
+
+def _render(page, app):
+    try:
+        app.render_page(PAGES[page])
+    except PageStopped:
+        pass
+
+
+def warm_up(dataset_dir):
+    """Render every page once so on-disk caches (feature store, artefacts) exist before timing"""
+    app, _ = _import_app(dataset_dir)
+    for page in PAGES:
+        _render(page, app)
+
+
+def measure_page(dataset_dir, page, trace=True):
+    """Render one page in this process: cold, warm, then cold again under tracemalloc"""
+    app, stub = _import_app(dataset_dir)
+
+    started = time.perf_counter()
+    _render(page, app)
+    cold_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    _render(page, app)
+    warm_seconds = time.perf_counter() - started
+    result = {'page': page, 'cold_s': cold_seconds, 'warm_s': warm_seconds,
+              'peak_rss_mb': peak_rss_mb(), 'traced_peak_mb': None, 'traced_live_blocks': None}
+
+    if trace:
+        stub.clear_caches()
+        tracemalloc.start()
+        _render(page, app)
+        _, peak = tracemalloc.get_traced_memory()
+        # Tracing starts just before the render, so every traced block was allocated by it
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+        result.update(traced_peak_mb=peak / 2 ** 20, traced_live_blocks=blocks)
+    return result
+
+
+def _in_fresh_process(func, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(func, *args).result()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def append_results(results, path=RESULTS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    results = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    if path.exists() and list(pd.read_csv(path, nrows=0).columns) != RESULT_COLUMNS:
+        # Results written with other columns: rewrite the file with the union of both
+        results = pd.concat([pd.read_csv(path), results], ignore_index=True)
+        results.to_csv(path, index=False)
+        return
+    results.to_csv(path, mode='a', header=not path.exists(), index=False)
+
+
+def run(rows=DATASET_ROWS, pages=tuple(PAGES), label='', benchmark_dir=BENCHMARK_DIR, seed=42,
+        n_jobs=None, trace=True, regenerate=False):
+    """Benchmark ``pages`` on a synthetic dataset of each size and append the results"""
+    recorded_at = datetime.now().isoformat(timespec='seconds')
+    revision = git_revision()
+    results_path = Path(benchmark_dir).resolve() / RESULTS_PATH.name
+    for n_rows in rows:
+        # Prepared in its own process so its memory peak is never attributed to a page
+        dataset_dir = _in_fresh_process(prepare_dataset, n_rows, benchmark_dir, seed, n_jobs, regenerate)
+        _in_fresh_process(warm_up, dataset_dir)
+        results = []
+        for page in pages:
+            result = _in_fresh_process(measure_page, dataset_dir, page, trace)
+            results.append({'recorded_at': recorded_at, 'revision': revision, 'label': label,
+                            'rows': n_rows, **result})
+            print(f"{n_rows:>12,} rows  {page:<18} cold {result['cold_s']:8.2f}s  warm {result['warm_s']:8.2f}s  "
+                  f"peak RSS {result['peak_rss_mb']:8.0f} MiB")
+        append_results(results, results_path)
+    return results_path
+
+
+def compare(base, new, path=RESULTS_PATH):
+    """Latest results of two labels (or revisions) side by side, with new/base ratios"""
+    results = pd.read_csv(path, dtype={'revision': str, 'label': str}).fillna({'label': '', 'revision': ''})
+    runs = {}
+    for name in (base, new):
+        selected = results[(results['label'] == name) | (results['revision'] == name)]
+        if selected.empty:
+            raise ValueError(f"no results labelled or at revision {name!r} in {path}")
+        runs[name] = selected.sort_values('recorded_at').groupby(['rows', 'page']).last()
+    metrics = ['cold_s', 'warm_s', 'peak_rss_mb']
+    table = runs[base][metrics].join(runs[new][metrics], lsuffix=f' [{base}]', rsuffix=f' [{new}]', how='inner')
+    for metric in metrics:
+        table[f"{metric} ratio"] = table[f"{metric} [{new}]"] / table[f"{metric} [{base}]"]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pages on synthetic data")
+    parser.add_argument('command', choices=['run', 'compare'])
+    parser.add_argument('names', nargs='*', help="For 'compare': the base and new label or git revision")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DATASET_ROWS), help="Transaction rows per dataset")
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--label', default='', help="Label stored with the results, e.g. a branch name")
+    parser.add_argument('--benchmark-dir', default=str(BENCHMARK_DIR), help="Synthetic datasets and results.csv")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for the dataset refresh")
+    parser.add_argument('--no-trace', action='store_true', help="Skip the tracemalloc render (faster)")
+    parser.add_argument('--regenerate', action='store_true', help="Rebuild datasets even if present")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        if len(args.names) != 2:
+            parser.error("'compare' takes a base and a new label or revision")
+        table = compare(*args.names, Path(args.benchmark_dir) / RESULTS_PATH.name)
+        print(table.round(3).to_string())
+        return
+
+    path = run(args.rows, args.pages, args.label, args.benchmark_dir, args.seed, args.jobs,
+               trace=not args.no_trace, regenerate=args.regenerate)
+    print(f"Results appended to {path}")
+
+
+if __name__ == '__main__':
+    main()
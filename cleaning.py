@@ -0,0 +1,74 @@
+"""Cleaning stage for the raw transaction file.
+
+Every reader of ``bank_data_C.csv`` (the columnar cache, the streaming
+aggregates, the RFM batch CLI) passes its rows through ``clean_transactions``,
+so dates are parsed exactly once. The file has only a few hundred distinct
+transaction days and a few thousand distinct birth dates, so each column is
+factorised and only the distinct strings are parsed; the parsed values are
+mapped back to rows through the integer codes.
+
+Two fixes from the cleaning notebook live here as well: two-digit birth years
+that parse into the future are moved back a century, and ``TransactionDate``
+is combined with the HHMMSS ``TransactionTime`` into ``TransactionDateTime``
+with integer arithmetic.
+"""
+import numpy as np
+import pandas as pd
+
+from schema import TRANSACTION_SCHEMA, apply_schema
+
+DATE_FORMAT = '%d/%m/%y'
+NAT = np.datetime64('NaT', 'ns')
+
+
+def _date_lookup(values, date_format=DATE_FORMAT):
+    """Row indexes into a parsed table of the distinct strings (the last entry is NaT)"""
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), sort=False)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=date_format, errors='coerce')
+    lookup = np.append(parsed.to_numpy(dtype='datetime64[ns]'), NAT)
+    return np.where(codes < 0, len(uniques), codes), lookup
+
+
+def parse_dates(values, date_format=DATE_FORMAT):
+    """Parse date strings through their distinct values; unparseable entries become NaT"""
+    index, lookup = _date_lookup(values, date_format)
+    return lookup[index]
+
+
+def parse_birth_dates(values, reference, date_format=DATE_FORMAT):
+    """Parse birth dates, moving any that fall after ``reference`` back one century"""
+    index, lookup = _date_lookup(values, date_format)
+    previous_century = (pd.DatetimeIndex(lookup) - pd.DateOffset(years=100)).to_numpy(dtype='datetime64[ns]')
+    births = lookup[index]
+    return np.where(births > np.asarray(reference, dtype='datetime64[ns]'), previous_century[index], births)
+
+
+def combine_date_time(dates, times):
+    """``dates`` plus HHMMSS integer ``times`` as datetime64, NaT where either is missing"""
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    times = pd.to_numeric(pd.Series(times, copy=False), errors='coerce').to_numpy(dtype=np.float64)
+    valid = ~np.isnat(dates) & np.isfinite(times)
+    hhmmss = np.where(valid, times, 0).astype(np.int64)
+    seconds = hhmmss // 10000 * 3600 + hhmmss // 100 % 100 * 60 + hhmmss % 100
+    combined = np.where(valid, dates.view(np.int64) + seconds * 1_000_000_000, NAT.view(np.int64))
+    return combined.view('datetime64[ns]')
+
+
+def clean_transactions(raw_df):
+    """Rename columns, parse dates, fix birth centuries, add ``TransactionDateTime`` and apply the schema"""
+    raw_df = raw_df.rename(columns={'TransactionAmount (INR)': 'TransactionAmount'})
+
+    if 'TransactionDate' in raw_df.columns and not pd.api.types.is_datetime64_any_dtype(raw_df['TransactionDate']):
+        raw_df['TransactionDate'] = parse_dates(raw_df['TransactionDate'])
+
+    if 'CustomerDOB' in raw_df.columns and not pd.api.types.is_datetime64_any_dtype(raw_df['CustomerDOB']):
+        if 'TransactionDate' in raw_df.columns:
+            reference = raw_df['TransactionDate'].to_numpy(dtype='datetime64[ns]')
+        else:
+            reference = np.datetime64(pd.Timestamp.today().normalize())
+        raw_df['CustomerDOB'] = parse_birth_dates(raw_df['CustomerDOB'], reference)
+
+    if 'TransactionDate' in raw_df.columns and 'TransactionTime' in raw_df.columns:
+        raw_df['TransactionDateTime'] = combine_date_time(raw_df['TransactionDate'], raw_df['TransactionTime'])
+
+    return apply_schema(raw_df, TRANSACTION_SCHEMA)
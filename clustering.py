@@ -0,0 +1,310 @@
+"""Offline KMeans segmentation pipeline with a fast assign-only scoring path.
+
+Training mirrors ``03_unsupervise_learning.ipynb``: log1p on frequency and
+monetary, ``RobustScaler``, then ``KMeans``. The fitted scaler statistics and
+centroids are saved as a small versioned JSON artefact under ``Data/models``.
+Scoring new or refreshed RFM rows never refits: rows are scaled with the
+stored median/IQR and assigned to the nearest centroid with one vectorised
+distance computation per chunk.
+
+    python clustering.py train            # fit on rfm_scores.csv, save a new model version
+    python clustering.py assign           # re-score rfm_scores.csv with the latest model
+    python clustering.py select --jobs 8  # k sweep with mini-batch KMeans in a process pool
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_cache import PROCESSED_DIR, RFM_SCORES_PATH, SEGMENTS_PATH, atomic_write, atomic_write_json
+from schema import SEGMENT_SCHEMA, apply_schema
+
+MODEL_DIR = Path('Data/models')
+PROFILES_PATH = PROCESSED_DIR / 'cluster_profiles.csv'
+SELECTION_PATH = PROCESSED_DIR / 'kmeans_model_selection.csv'
+LATEST_MODEL_FILE = 'LATEST'
+
+FEATURES = ['recency_days', 'frequency', 'monetary']
+LOG_FEATURES = ['frequency', 'monetary']
+
+# Business names of the four KMeans segments. ' Big Spenders' keeps the
+# leading space it has in the existing artefacts and dashboard colour maps.
+BIG_SPENDERS = ' Big Spenders'
+LOYAL_CUSTOMERS = 'Loyal Customers'
+RECENT_LOW_VALUE = 'Recent Low Value'
+AT_RISK = 'At-Risk'
+
+
+def transform_features(rfm):
+    """Model input matrix: recency as-is, log1p of frequency and monetary"""
+    features = rfm[FEATURES].to_numpy(dtype=np.float64, copy=True)
+    for i, name in enumerate(FEATURES):
+        if name in LOG_FEATURES:
+            features[:, i] = np.log1p(features[:, i])
+    return features
+
+
+@dataclass
+class ClusterModel:
+    """Fitted RobustScaler statistics and KMeans centroids"""
+    version: str
+    center: np.ndarray
+    scale: np.ndarray
+    centroids: np.ndarray
+    segment_names: dict = field(default_factory=dict)
+    inertia: float = float('nan')
+    n_samples: int = 0
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+    def scale_features(self, features):
+        return (features - self.center) / self.scale
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'features': FEATURES,
+            'log_features': LOG_FEATURES,
+            'center': self.center.tolist(),
+            'scale': self.scale.tolist(),
+            'centroids': self.centroids.tolist(),
+            'segment_names': {str(k): v for k, v in self.segment_names.items()},
+            'inertia': self.inertia,
+            'n_samples': self.n_samples,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            version=data['version'],
+            center=np.asarray(data['center'], dtype=np.float64),
+            scale=np.asarray(data['scale'], dtype=np.float64),
+            centroids=np.asarray(data['centroids'], dtype=np.float64),
+            segment_names={int(k): v for k, v in data.get('segment_names', {}).items()},
+            inertia=data.get('inertia', float('nan')),
+            n_samples=data.get('n_samples', 0),
+        )
+
+
+def name_clusters(profile_means):
+    """Name clusters from their mean RFM profile.
+
+    For k=4, following the notebook's reading of the profiles: the highest
+    monetary mean is Big Spenders; of the rest, the highest frequency is Loyal
+    Customers; of the remaining two, the lower recency is Recent Low Value and
+    the other At-Risk. Other k values get neutral ``Cluster n`` names.
+    """
+    if len(profile_means) != 4:
+        return {int(c): f"Cluster {c}" for c in profile_means.index}
+    remaining = profile_means.copy()
+    names = {}
+    for name, column, pick in [
+        (BIG_SPENDERS, 'monetary', 'idxmax'),
+        (LOYAL_CUSTOMERS, 'frequency', 'idxmax'),
+        (RECENT_LOW_VALUE, 'recency_days', 'idxmin'),
+    ]:
+        cluster = getattr(remaining[column], pick)()
+        names[int(cluster)] = name
+        remaining = remaining.drop(index=cluster)
+    names[int(remaining.index[0])] = AT_RISK
+    return names
+
+
+def fit_model(rfm, n_clusters=4, random_state=42, n_init=10, max_iter=300):
+    """Fit scaler and KMeans on an RFM table and return the model artefact"""
+    # scikit-learn is only needed for training; scoring uses the stored arrays
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import RobustScaler
+
+    features = transform_features(rfm)
+    scaler = RobustScaler().fit(features)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init, max_iter=max_iter)
+    labels = kmeans.fit_predict(scaler.transform(features))
+
+    model = ClusterModel(
+        version=datetime.now().strftime('%Y%m%dT%H%M%S'),
+        center=np.asarray(scaler.center_, dtype=np.float64),
+        scale=np.asarray(scaler.scale_, dtype=np.float64),
+        centroids=np.asarray(kmeans.cluster_centers_, dtype=np.float64),
+        inertia=float(kmeans.inertia_),
+        n_samples=len(features),
+    )
+    profile_means = rfm[FEATURES].groupby(labels).mean()
+    model.segment_names = name_clusters(profile_means)
+    return model
+
+
+def assign_clusters(model, rfm, chunk_rows=250_000):
+    """Nearest-centroid labels for RFM rows, without refitting.
+
+    Squared distances expand to ``|x|^2 - 2 x.c + |c|^2``; the ``|x|^2`` term is
+    the same for every centroid and is dropped, so each chunk costs one matrix
+    product. Chunking bounds the (rows x k) distance matrix.
+    """
+    features = model.scale_features(transform_features(rfm))
+    centroids = model.centroids
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    labels = np.empty(len(features), dtype=np.int8)
+    for start in range(0, len(features), chunk_rows):
+        block = features[start:start + chunk_rows]
+        distances = centroid_norms - 2 * block @ centroids.T
+        labels[start:start + chunk_rows] = distances.argmin(axis=1)
+    return labels
+
+
+def score_segments(model, rfm):
+    """Segments frame in the shape of ``kmeans_customer_segments.csv``"""
+    labels = assign_clusters(model, rfm)
+    segments = rfm[['CustomerID'] + FEATURES].copy()
+    segments['Cluster'] = labels
+    segments['Segment_Name'] = pd.Series(labels).map(model.segment_names).to_numpy()
+    return apply_schema(segments, SEGMENT_SCHEMA)
+
+
+def cluster_profiles(segments):
+    """Per-cluster profile table in the shape of ``cluster_profiles.csv``"""
+    profiles = (
+        segments.groupby('Cluster')
+        .agg(
+            Customers=('CustomerID', 'count'),
+            Recency_Mean=('recency_days', 'mean'),
+            Frequency_Mean=('frequency', 'mean'),
+            Monetary_Mean=('monetary', 'mean')
+        )
+        .round(2)
+    )
+    profiles['Percentage'] = (profiles['Customers'] / len(segments) * 100).round(1)
+    return profiles.reset_index()
+
+
+def write_segment_artifacts(segments, processed_dir=PROCESSED_DIR):
+    """Atomically write the segments and cluster profile files the dashboard reads"""
+    processed_dir = Path(processed_dir)
+    atomic_write(processed_dir / SEGMENTS_PATH.name, lambda tmp: segments.to_csv(tmp, index=False))
+    profiles = cluster_profiles(segments)
+    atomic_write(processed_dir / PROFILES_PATH.name, lambda tmp: profiles.to_csv(tmp, index=False))
+
+
+def save_model(model, model_dir=MODEL_DIR):
+    """Save a model version and point ``LATEST`` at it; returns the artefact path"""
+    model_dir = Path(model_dir)
+    path = model_dir / f"kmeans_{model.version}.json"
+    atomic_write_json(path, model.to_dict(), indent=2)
+    atomic_write(model_dir / LATEST_MODEL_FILE, lambda tmp_path: Path(tmp_path).write_text(path.name))
+    return path
+
+
+def load_model(path=MODEL_DIR):
+    """Load a model artefact, or the latest version from a model directory; None if absent"""
+    path = Path(path)
+    if path.is_dir():
+        latest = path / LATEST_MODEL_FILE
+        if not latest.exists():
+            return None
+        path = path / latest.read_text().strip()
+    if not path.exists():
+        return None
+    with open(path) as fh:
+        return ClusterModel.from_dict(json.load(fh))
+
+
+def evaluate_k(features, k, mode='minibatch', random_state=42, batch_size=4096,
+               sample_size=10_000, chunk_rows=100_000):
+    """Fit one k and score it: inertia on all rows, silhouette on a sample, Davies-Bouldin.
+
+    ``mode`` is ``full`` (the notebook's KMeans), ``minibatch`` (MiniBatchKMeans
+    over the whole matrix) or ``streaming`` (MiniBatchKMeans.partial_fit over
+    shuffled chunks, as if the rows arrived incrementally).
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+    started = time.perf_counter()
+    if mode == 'full':
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=20, max_iter=500).fit(features)
+    elif mode == 'minibatch':
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=batch_size, n_init=3)
+        model.fit(features)
+    elif mode == 'streaming':
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=batch_size)
+        order = np.random.default_rng(random_state).permutation(len(features))
+        for start in range(0, len(order), chunk_rows):
+            model.partial_fit(features[order[start:start + chunk_rows]])
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    fit_seconds = time.perf_counter() - started
+
+    labels = model.predict(features)
+    sample = np.random.default_rng(random_state).choice(len(features), min(sample_size, len(features)), replace=False)
+    return {
+        'k': k,
+        'mode': mode,
+        'inertia': float(-model.score(features)),
+        'silhouette': float(silhouette_score(features[sample], labels[sample])),
+        'davies_bouldin': float(davies_bouldin_score(features, labels)),
+        'fit_seconds': round(fit_seconds, 2),
+    }
+
+
+def select_k(rfm, k_values=range(2, 11), mode='minibatch', n_jobs=None, random_state=42, sample_size=10_000):
+    """Evaluate each k in a process pool and return one row of metrics per k"""
+    from sklearn.preprocessing import RobustScaler
+
+    features = RobustScaler().fit_transform(transform_features(rfm))
+    evaluate = partial(evaluate_k, features, mode=mode, random_state=random_state, sample_size=sample_size)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        results = list(pool.map(evaluate, k_values))
+    return pd.DataFrame(results).sort_values('k').reset_index(drop=True)
+
+
+def write_selection(selection, path=SELECTION_PATH):
+    """Atomically write the k sweep results the dashboard displays"""
+    atomic_write(path, lambda tmp: selection.to_csv(tmp, index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, apply or select the KMeans customer segmentation")
+    parser.add_argument('command', choices=['train', 'assign', 'select'])
+    parser.add_argument('--rfm', default=str(RFM_SCORES_PATH), help="RFM table to train on or score")
+    parser.add_argument('--model-dir', default=str(MODEL_DIR))
+    parser.add_argument('--processed-dir', default=str(PROCESSED_DIR))
+    parser.add_argument('--clusters', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--k-min', type=int, default=2, help="Smallest k for 'select'")
+    parser.add_argument('--k-max', type=int, default=10, help="Largest k for 'select'")
+    parser.add_argument('--mode', choices=['minibatch', 'streaming', 'full'], default='minibatch')
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for 'select' (default: all cores)")
+    args = parser.parse_args(argv)
+
+    rfm = pd.read_csv(args.rfm)
+    if args.command == 'select':
+        selection = select_k(rfm, range(args.k_min, args.k_max + 1), args.mode, args.jobs, args.seed)
+        write_selection(selection, Path(args.processed_dir) / SELECTION_PATH.name)
+        print(selection.to_string(index=False))
+        return
+
+    if args.command == 'train':
+        model = fit_model(rfm, n_clusters=args.clusters, random_state=args.seed)
+        path = save_model(model, args.model_dir)
+        print(f"Saved model {model.version} ({model.n_clusters} clusters, inertia {model.inertia:,.0f}) to {path}")
+    else:
+        model = load_model(args.model_dir)
+        if model is None:
+            parser.error(f"no trained model in {args.model_dir}; run 'train' first")
+
+    segments = score_segments(model, rfm)
+    write_segment_artifacts(segments, args.processed_dir)
+    print(f"Scored {len(segments):,} customers with model {model.version}")
+
+
+if __name__ == '__main__':
+    main()
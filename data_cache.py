@@ -0,0 +1,194 @@
+"""Columnar cache for the raw transaction CSV.
+
+Parsing ``Data/bank_data_C.csv`` (~1M rows, two day-first date columns) is the
+slowest part of a cold start. The first load writes a Parquet copy with dates
+already cleaned (see ``cleaning.py``); later loads read that
+copy and only rebuild it when the source CSV changes (mtime/size, confirmed
+with a content hash so a ``touch`` does not force a rebuild). Small ingest-time
+artefacts (the Raw Data profile, time-series rollups, gender and location
+counts) are written alongside the Parquet copy and share its freshness.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from cleaning import clean_transactions
+from demographics import Demographics, build_demographics
+from profiling import DatasetProfile, profile_frame
+from rollups import Rollups, build_rollups
+from schema import SCHEMA_VERSION
+
+RAW_DATA_PATH = Path('Data/bank_data_C.csv')
+CACHE_DIR = Path('Data/cache')
+
+# Processed artefacts the dashboard reads, written by rfm.py, clustering.py and pipeline.py
+PROCESSED_DIR = Path('Data/processed')
+RFM_SCORES_PATH = PROCESSED_DIR / 'rfm_scores.csv'
+SEGMENTS_PATH = PROCESSED_DIR / 'kmeans_customer_segments.csv'
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return a content hash of a file, read in fixed-size chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path, with_digest=False):
+    """Return the (mtime, size[, digest]) fingerprint of a source file"""
+    stat = os.stat(path)
+    fingerprint = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    if with_digest:
+        fingerprint['digest'] = file_digest(path)
+    return fingerprint
+
+
+def data_version(*paths):
+    """Cheap version key for a set of files, suitable for cache keys"""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+
+def atomic_write(path, write_fn):
+    """Write ``path`` through a temporary sibling file and rename it into place.
+
+    ``write_fn`` receives the temporary path. Readers never observe a partially
+    written file because ``os.replace`` is atomic on the same filesystem.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_write_json(path, obj, **dump_kwargs):
+    """Write ``obj`` as JSON to ``path`` atomically (see ``atomic_write``)"""
+    def write(tmp_path):
+        with open(tmp_path, 'w') as fh:
+            json.dump(obj, fh, **dump_kwargs)
+    atomic_write(path, write)
+
+
+def parse_raw_transactions(path=RAW_DATA_PATH):
+    """Read the raw transaction CSV and run it through the cleaning stage"""
+    return clean_transactions(pd.read_csv(path))
+
+
+def iter_raw_transactions(path=RAW_DATA_PATH, chunk_rows=1_000_000):
+    """Yield cleaned transactions in chunks of at most ``chunk_rows`` rows"""
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield clean_transactions(chunk)
+
+
+def cache_paths(path, cache_dir=CACHE_DIR):
+    """Return the (parquet, metadata) cache paths for a source CSV"""
+    cache_dir = Path(cache_dir)
+    stem = Path(path).stem
+    return cache_dir / f"{stem}.parquet", cache_dir / f"{stem}.meta.json"
+
+
+# Artefact name -> (build from the cleaned frame, load from its dict), written with every cache build
+INGEST_ARTEFACTS = {
+    'profile': (profile_frame, DatasetProfile.from_dict),
+    'rollups': (build_rollups, Rollups.from_dict),
+    'demographics': (build_demographics, Demographics.from_dict),
+}
+
+
+def artefact_path(path, name, cache_dir=CACHE_DIR):
+    """Return the path of an ingest-time artefact written alongside the cache"""
+    return Path(cache_dir) / f"{Path(path).stem}.{name}.json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_is_fresh(path, cache_dir=CACHE_DIR):
+    """Check whether the cached Parquet copy still matches the source CSV.
+
+    The mtime/size check is free; when only the mtime moved, the content hash
+    decides, and a matching hash refreshes the stored mtime.
+    """
+    parquet_path, meta_path = cache_paths(path, cache_dir)
+    meta = _read_meta(meta_path)
+    if meta is None or not parquet_path.exists():
+        return False
+    if not all(artefact_path(path, name, cache_dir).exists() for name in INGEST_ARTEFACTS):
+        return False
+    if meta.get('schema') != SCHEMA_VERSION:
+        return False
+
+    current = source_fingerprint(path)
+    if current['size'] != meta.get('size'):
+        return False
+    if current['mtime_ns'] == meta.get('mtime_ns'):
+        return True
+
+    if file_digest(path) != meta.get('digest'):
+        return False
+    meta['mtime_ns'] = current['mtime_ns']
+    atomic_write_json(meta_path, meta)
+    return True
+
+
+def build_cache(path=RAW_DATA_PATH, cache_dir=CACHE_DIR):
+    """Parse the source CSV and write its Parquet copy and ingest artefacts, returning the frame.
+
+    Without a Parquet engine (pyarrow) the parsed frame is returned uncached.
+    """
+    parquet_path, meta_path = cache_paths(path, cache_dir)
+    fingerprint = source_fingerprint(path, with_digest=True)
+    raw_df = parse_raw_transactions(path)
+    try:
+        atomic_write(parquet_path, lambda tmp_path: raw_df.to_parquet(tmp_path, index=False))
+    except ImportError:
+        return raw_df
+    for name, (build, _) in INGEST_ARTEFACTS.items():
+        atomic_write_json(artefact_path(path, name, cache_dir), {'digest': fingerprint['digest'], 'data': build(raw_df).to_dict()})
+    atomic_write_json(meta_path, {**fingerprint, 'source': str(path), 'schema': SCHEMA_VERSION})
+    return raw_df
+
+
+def load_artefact(name, path=RAW_DATA_PATH, cache_dir=CACHE_DIR):
+    """An ingest-time artefact of the current source CSV, or None until the cache is rebuilt"""
+    if not cache_is_fresh(path, cache_dir):
+        return None
+    stored = _read_meta(artefact_path(path, name, cache_dir))
+    meta = _read_meta(cache_paths(path, cache_dir)[1])
+    if stored is None or meta is None or stored.get('digest') != meta.get('digest'):
+        return None
+    _, load = INGEST_ARTEFACTS[name]
+    return load(stored['data'])
+
+
+def load_transactions(path=RAW_DATA_PATH, cache_dir=CACHE_DIR, rebuild=False):
+    """Load the raw transactions, from the Parquet cache when it is current"""
+    if not rebuild and cache_is_fresh(path, cache_dir):
+        parquet_path, _ = cache_paths(path, cache_dir)
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
+    return build_cache(path, cache_dir)
@@ -0,0 +1,70 @@
+"""Gender and location counts of the raw transactions for the Raw Data page.
+
+The counts depend on the transactions alone, so they are built once when the
+columnar cache is built and stored as an ingest-time artefact beside it (see
+``INGEST_ARTEFACTS`` in ``data_cache.py``), like the profile and rollups.
+``CustLocation`` is free text with thousands of distinct spellings, so city
+names are normalised once per distinct value and mapped back through the
+category codes. Streaming mode keeps a heavy-hitters sketch of the same
+normalised names instead (see ``raw_aggregates.py``).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def normalise_city_names(names):
+    """Trimmed, single-spaced, title-case city names with punctuation dropped (blank becomes missing)"""
+    names = pd.Series(names, dtype=object)
+    cleaned = (names.str.replace(r'[^\w\s&]', ' ', regex=True)
+               .str.replace(r'\s+', ' ', regex=True).str.strip().str.title())
+    return cleaned.where(cleaned.str.len() > 0)
+
+
+def normalise_locations(values):
+    """Categorical of normalised city names; spellings that normalise alike share a category"""
+    values = pd.Series(values, copy=False)
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    names = normalise_city_names(values.cat.categories.to_numpy())
+    name_codes, cities = pd.factorize(names)
+    # Code -1 (missing) picks the appended -1 and stays missing
+    codes = np.append(name_codes, -1)[values.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(codes, categories=cities)
+
+
+def _counts(values):
+    counts = pd.Series(values, copy=False).value_counts()
+    return counts[counts > 0].astype('int64')
+
+
+@dataclass
+class Demographics:
+    """Transaction counts per gender and per normalised location, largest first"""
+    genders: pd.Series
+    locations: pd.Series
+
+    def top_locations(self, n=15):
+        return self.locations.head(n)
+
+    def to_dict(self):
+        return {
+            'genders': {str(k): int(v) for k, v in self.genders.items()},
+            'locations': {str(k): int(v) for k, v in self.locations.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            genders=pd.Series(data['genders'], dtype='int64'),
+            locations=pd.Series(data['locations'], dtype='int64'),
+        )
+
+
+def build_demographics(raw_df):
+    """Gender and location counts of a cleaned transaction frame (missing values left out)"""
+    return Demographics(
+        genders=_counts(raw_df['CustGender']),
+        locations=_counts(normalise_locations(raw_df['CustLocation'])),
+    )
@@ -0,0 +1,127 @@
+"""Location and gender aggregates of the transactions, joined to customer segments.
+
+Transactions are reduced to one row per (normalised location, gender,
+segment, cluster) with counts, amount sums and distinct customers, a table
+small enough that the Segments page can slice segments by city without
+touching transaction rows. The refresh pipeline saves the table next to the
+other processed artefacts. The Raw Data page's plain gender and location
+counts do not depend on segments and come from ``demographics.py``.
+"""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_cache import PROCESSED_DIR, RAW_DATA_PATH, SEGMENTS_PATH, atomic_write_json, source_fingerprint
+from demographics import normalise_locations
+from rfm import UNASSIGNED_CLUSTER, UNASSIGNED_SEGMENT
+
+DIMENSIONS_PATH = PROCESSED_DIR / 'dimension_aggregates.json'
+DIMENSION_LEVELS = ['Location', 'Gender', 'Segment_Name', 'Cluster']
+MEASURES = ['Transactions', 'Amount', 'Customers']
+
+
+def segment_labels(customer_ids, segments_df):
+    """Segment name and cluster of each row's customer (the unassigned labels when unscored)"""
+    customer_ids = pd.Series(customer_ids, copy=False)
+    if not isinstance(customer_ids.dtype, pd.CategoricalDtype):
+        customer_ids = customer_ids.astype('category')
+    # Look up each distinct ID once, then broadcast through the category codes
+    positions = pd.Index(segments_df['CustomerID'].astype(str)).get_indexer(customer_ids.cat.categories.astype(str))
+    positions = np.append(positions, -1)[customer_ids.cat.codes.to_numpy()]
+    names = pd.Categorical(segments_df['Segment_Name'].astype(str))
+    categories = list(names.categories) + [UNASSIGNED_SEGMENT]
+    segment_codes = np.append(names.codes, len(categories) - 1)[positions]
+    clusters = np.append(segments_df['Cluster'].to_numpy(dtype=np.int64), UNASSIGNED_CLUSTER)[positions]
+    return pd.Categorical.from_codes(segment_codes, categories=categories), clusters
+
+
+@dataclass
+class DimensionAggregates:
+    """Transactions, amount and customers per location, gender, segment and cluster"""
+    table: pd.DataFrame
+    source: dict = field(default_factory=dict)
+
+    def _filtered(self, locations=None, genders=None, segments=None, clusters=None):
+        table = self.table
+        mask = np.ones(len(table), dtype=bool)
+        for level, selected in zip(DIMENSION_LEVELS, (locations, genders, segments, clusters)):
+            if selected is not None:
+                mask &= table.index.get_level_values(level).isin(list(selected))
+        return table[mask]
+
+    def locations(self, n=None):
+        """Totals per location, most transactions first (customers counted once per segment and gender)"""
+        totals = self.table.groupby(level='Location', observed=True)[MEASURES].sum()
+        totals = totals.sort_values('Transactions', ascending=False)
+        return totals if n is None else totals.head(n)
+
+    def segment_slice(self, locations=None, genders=None, segments=None, clusters=None,
+                      by=('Location', 'Segment_Name')):
+        """Totals of the selected cells grouped by the ``by`` levels"""
+        selected = self._filtered(locations, genders, segments, clusters)
+        return selected.groupby(level=list(by), observed=True)[MEASURES].sum()
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'table': json.loads(self.table.reset_index().to_json(orient='split', index=False)),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        table = pd.DataFrame(data['table']['data'], columns=data['table']['columns'])
+        return cls(table=table.set_index(DIMENSION_LEVELS), source=data['source'])
+
+
+def build_dimensions(raw_df, segments_df=None, source=None):
+    """Aggregate a cleaned transaction frame by location, gender, segment and cluster"""
+    customer_ids = raw_df['CustomerID']
+    if segments_df is None:
+        segments = pd.Categorical.from_codes(np.zeros(len(raw_df), dtype=np.int8), categories=[UNASSIGNED_SEGMENT])
+        clusters = np.full(len(raw_df), UNASSIGNED_CLUSTER, dtype=np.int64)
+    else:
+        segments, clusters = segment_labels(customer_ids, segments_df)
+    if isinstance(customer_ids.dtype, pd.CategoricalDtype):
+        customer_codes = customer_ids.cat.codes.to_numpy()
+    else:
+        customer_codes = pd.factorize(customer_ids)[0]
+
+    frame = pd.DataFrame({
+        'Location': normalise_locations(raw_df['CustLocation']),
+        'Gender': raw_df['CustGender'].to_numpy(),
+        'Segment_Name': segments,
+        'Cluster': clusters,
+        'Amount': raw_df['TransactionAmount'].to_numpy(dtype=np.float64),
+        'customer': customer_codes,
+    })
+    grouped = frame.groupby(DIMENSION_LEVELS, observed=True, dropna=False, sort=True)
+    table = pd.DataFrame({
+        'Transactions': grouped.size(),
+        'Amount': grouped['Amount'].sum(),
+        'Customers': grouped['customer'].nunique(),
+    })
+    return DimensionAggregates(table=table, source=dict(source or {}))
+
+
+def dimension_sources(source=RAW_DATA_PATH, segments=SEGMENTS_PATH):
+    """Fingerprints of the files a dimension table is built from"""
+    return {'transactions': source_fingerprint(source), 'segments': source_fingerprint(segments)}
+
+
+def save_dimensions(dimensions, path=DIMENSIONS_PATH):
+    atomic_write_json(path, dimensions.to_dict())
+
+
+def load_dimensions(path=DIMENSIONS_PATH, source=RAW_DATA_PATH, segments=SEGMENTS_PATH):
+    """Saved dimension table, or None when absent or built from different transactions or segments"""
+    path = Path(path)
+    if not path.exists() or not Path(source).exists() or not Path(segments).exists():
+        return None
+    with open(path) as fh:
+        dimensions = DimensionAggregates.from_dict(json.load(fh))
+    if dimensions.source != dimension_sources(source, segments):
+        return None
+    return dimensions
@@ -0,0 +1,90 @@
+"""On-demand file exports for the Download Center.
+
+Exports are produced only when a user asks for one. CSV is encoded in row
+chunks into a temporary file on disk, optionally gzip-compressed on the fly,
+so no full-file string is ever built. Parquet is written straight into the
+file. The caller keeps only the file's path and removes it with
+``discard_export`` once it has been downloaded or gone stale. Files of
+sessions that never come back are swept once they are older than
+``EXPORT_TTL_SECONDS``, whenever another export is prepared.
+"""
+import gzip
+import os
+import tempfile
+import time
+from pathlib import Path
+
+CHUNK_ROWS = 100_000
+EXPORT_DIR = Path(tempfile.gettempdir()) / 'banktrust-exports'
+EXPORT_PREFIX = 'export-'
+EXPORT_TTL_SECONDS = 60 * 60
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def iter_csv_chunks(df, chunk_rows=CHUNK_ROWS, index=False):
+    """Yield the UTF-8 CSV encoding of ``df``, ``chunk_rows`` rows at a time"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=index, header=(start == 0)).encode('utf-8')
+
+
+def write_export(df, export_format='CSV', chunk_rows=CHUNK_ROWS, index=False):
+    """Write ``df`` in ``export_format`` to a new temporary file and return its path"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    sweep_exports()
+    suffix = '.' + EXPORT_FORMATS[export_format][0]
+    with tempfile.NamedTemporaryFile(dir=EXPORT_DIR, prefix=EXPORT_PREFIX, suffix=suffix, delete=False) as fh:
+        try:
+            if export_format == 'Parquet':
+                df.to_parquet(fh, index=index)
+            elif export_format == 'CSV (gzip)':
+                with gzip.GzipFile(fileobj=fh, mode='wb', mtime=0) as compressed:
+                    for chunk in iter_csv_chunks(df, chunk_rows, index):
+                        compressed.write(chunk)
+            else:
+                for chunk in iter_csv_chunks(df, chunk_rows, index):
+                    fh.write(chunk)
+        except BaseException:
+            fh.close()
+            discard_export(fh.name)
+            raise
+    return fh.name
+
+
+def discard_export(path):
+    """Remove an export file written by ``write_export`` (already-removed files are ignored)"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sweep_exports(max_age=EXPORT_TTL_SECONDS, export_dir=EXPORT_DIR):
+    """Create the export directory and remove export files older than ``max_age`` seconds"""
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - max_age
+    for path in export_dir.glob(f"{EXPORT_PREFIX}*"):
+        try:
+            expired = path.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if expired:
+            discard_export(path)
+
+
+def export_filename(stem, export_format):
+    """File name for an export, e.g. ``customer_segments.csv.gz``"""
+    return f"{stem}.{EXPORT_FORMATS[export_format][0]}"
+
+
+def export_mime(export_format):
+    return EXPORT_FORMATS[export_format][1]
@@ -0,0 +1,176 @@
+"""Memory-mapped customer feature store shared by every dashboard process.
+
+``st.cache_data`` gives each Streamlit worker its own copy of the segments
+frame and copies it again on every cache hit. The store writes the per-customer
+columns the Customer Explorer reads (recency, frequency, monetary, cluster,
+segment code and CustomerID) plus the explorer's lookup arrays as ``.npy``
+files, once per data version. Workers open them with ``mmap_mode='r'``, so all
+processes share the same page-cache pages and nothing is copied per session.
+
+Each data version lives in its own directory with a manifest written last; a
+version directory is complete once its manifest exists. Writing a version
+keeps the newest previous complete version, which workers that have not yet
+seen the new data may still be mapping, and removes the older ones.
+"""
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_cache import atomic_write, atomic_write_json
+from indexes import CustomerIndex, SegmentRangeIndex, customer_index_arrays, range_index_arrays
+
+FEATURE_STORE_DIR = Path('Data/cache/features')
+MANIFEST_FILE = 'manifest.json'
+
+INDEX_ARRAYS = {
+    'customer_index': ('keys', 'rows', 'sorted_monetary'),
+    'range_index': ('bounds', 'recency_order', 'recency_sorted', 'monetary_order', 'monetary_sorted'),
+}
+
+
+def _save_array(path, array):
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as fh:
+            np.save(fh, np.ascontiguousarray(array))
+    atomic_write(path, write)
+
+
+def feature_arrays(segments_df):
+    """Column and index arrays of the store, plus the segment names behind the codes"""
+    # Missing segment names keep code -1 rather than becoming a 'nan' segment
+    segment_names = pd.Categorical(segments_df['Segment_Name'])
+    customer_ids = segments_df['CustomerID'].astype(str).to_numpy(dtype=object)
+    arrays = {
+        'CustomerID': np.asarray(pd.Series(customer_ids).str.encode('utf-8').to_numpy(), dtype=bytes),
+        'recency_days': segments_df['recency_days'].to_numpy(dtype=np.int32),
+        'frequency': segments_df['frequency'].to_numpy(dtype=np.int32),
+        'monetary': segments_df['monetary'].to_numpy(dtype=np.float64),
+        'Cluster': segments_df['Cluster'].to_numpy(dtype=np.int8),
+        'segment_code': np.asarray(segment_names.codes, dtype=np.int8),
+    }
+    for name, array in customer_index_arrays(customer_ids, arrays['monetary']).items():
+        arrays[f"customer_index.{name}"] = array
+    range_arrays = range_index_arrays(
+        arrays['segment_code'], len(segment_names.categories), arrays['recency_days'], arrays['monetary']
+    )
+    for name, array in range_arrays.items():
+        arrays[f"range_index.{name}"] = array
+    return arrays, [str(name) for name in segment_names.categories]
+
+
+def complete_versions(store_dir=FEATURE_STORE_DIR):
+    """Version directories that have a manifest, oldest first"""
+    store_dir = Path(store_dir)
+    if not store_dir.exists():
+        return []
+    manifests = [path / MANIFEST_FILE for path in store_dir.iterdir() if (path / MANIFEST_FILE).exists()]
+    return [manifest.parent for manifest in sorted(manifests, key=lambda manifest: manifest.stat().st_mtime)]
+
+
+def prune_versions(version, store_dir=FEATURE_STORE_DIR, keep_previous=1):
+    """Remove complete versions other than ``version`` and the ``keep_previous`` newest before it"""
+    previous = [path for path in complete_versions(store_dir) if path.name != str(version)]
+    # Incomplete directories may still be being written by another process, so leave them alone
+    for old_dir in previous[:max(len(previous) - keep_previous, 0)]:
+        shutil.rmtree(old_dir)
+
+
+def write_feature_store(segments_df, version, store_dir=FEATURE_STORE_DIR):
+    """Write one data version of the store and prune older versions"""
+    store_dir = Path(store_dir)
+    version_dir = store_dir / str(version)
+    version_dir.mkdir(parents=True, exist_ok=True)
+    arrays, segment_names = feature_arrays(segments_df)
+    for name, array in arrays.items():
+        _save_array(version_dir / f"{name}.npy", array)
+
+    manifest = {
+        'version': str(version),
+        'rows': len(segments_df),
+        'segment_names': segment_names,
+        'arrays': {name: str(array.dtype) for name, array in arrays.items()},
+    }
+    atomic_write_json(version_dir / MANIFEST_FILE, manifest, indent=2)
+    prune_versions(version, store_dir)
+
+
+class FeatureStore:
+    """Read-only memory-mapped feature columns of one data version"""
+
+    def __init__(self, arrays, segment_names, version):
+        self.arrays = arrays
+        self.segment_names = segment_names
+        self.version = version
+
+    def __len__(self):
+        return len(self.arrays['monetary'])
+
+    def __getitem__(self, column):
+        return self.arrays[column]
+
+    def customer_index(self):
+        """CustomerID index over the mapped lookup arrays"""
+        return CustomerIndex(**{name: self.arrays[f"customer_index.{name}"] for name in INDEX_ARRAYS['customer_index']})
+
+    def range_index(self):
+        """Per-segment recency/monetary index over the mapped lookup arrays"""
+        arrays = {name: self.arrays[f"range_index.{name}"] for name in INDEX_ARRAYS['range_index']}
+        return SegmentRangeIndex(self.segment_names, self.arrays['recency_days'], self.arrays['monetary'], **arrays)
+
+    def sort_key(self, column):
+        """Values that order rows by ``column`` (segment codes follow the sorted segment names)"""
+        return self.arrays['segment_code'] if column == 'Segment_Name' else self.arrays[column]
+
+    def metrics_frame(self):
+        """Segment, cluster and RFM columns of every row (no CustomerIDs), for grouped statistics.
+
+        The frame is a transient copy of the mapped columns; callers keep only
+        what they aggregate from it.
+        """
+        return pd.DataFrame({
+            'recency_days': self.arrays['recency_days'],
+            'frequency': self.arrays['frequency'],
+            'monetary': self.arrays['monetary'],
+            'Cluster': self.arrays['Cluster'],
+            'Segment_Name': pd.Categorical.from_codes(self.arrays['segment_code'], self.segment_names),
+        })
+
+    def rows(self, positions):
+        """Materialise only the given rows in the shape of the segments frame"""
+        positions = np.asarray(positions, dtype=np.int64)
+        return pd.DataFrame({
+            'CustomerID': np.char.decode(self.arrays['CustomerID'][positions], 'utf-8'),
+            'recency_days': self.arrays['recency_days'][positions],
+            'frequency': self.arrays['frequency'][positions],
+            'monetary': self.arrays['monetary'][positions],
+            'Cluster': self.arrays['Cluster'][positions],
+            'Segment_Name': pd.Categorical.from_codes(self.arrays['segment_code'][positions], self.segment_names),
+        })
+
+
+def open_feature_store(version, store_dir=FEATURE_STORE_DIR):
+    """Map a complete store version read-only; None when it has not been written"""
+    version_dir = Path(store_dir) / str(version)
+    try:
+        with open(version_dir / MANIFEST_FILE) as fh:
+            manifest = json.load(fh)
+        arrays = {name: np.load(version_dir / f"{name}.npy", mmap_mode='r') for name in manifest['arrays']}
+    except (OSError, ValueError, KeyError):
+        return None
+    return FeatureStore(arrays, manifest['segment_names'], manifest['version'])
+
+
+def load_feature_store(load_segments, version, store_dir=FEATURE_STORE_DIR):
+    """Open the store for ``version``, writing it first if needed.
+
+    ``load_segments`` returns the segments frame; it is only called when the
+    version has not been written yet.
+    """
+    store = open_feature_store(version, store_dir)
+    if store is None:
+        write_feature_store(load_segments(), version, store_dir)
+        store = open_feature_store(version, store_dir)
+    return store
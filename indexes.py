@@ -0,0 +1,166 @@
+"""Lookup structures for the Customer Explorer.
+
+The explorer reruns on every keystroke and widget change. Rather than
+comparing every CustomerID per rerun, the indexes here are built once per data
+version and answer lookups by binary search over flat arrays.
+"""
+import numpy as np
+import pandas as pd
+
+
+def normalise_customer_id(customer_id):
+    """Canonical form used for CustomerID matching (trimmed, upper-case)"""
+    return str(customer_id).strip().upper()
+
+
+def customer_index_arrays(customer_ids, monetary):
+    """Sorted normalised CustomerID keys with their first row positions, plus sorted monetary values"""
+    normalised = pd.Series(np.asarray(customer_ids, dtype=object)).str.strip().str.upper().str.encode('utf-8')
+    normalised = np.asarray(normalised.to_numpy(), dtype=bytes)
+    order = np.argsort(normalised, kind='stable')
+    sorted_keys = normalised[order]
+    first = np.ones(len(sorted_keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return {
+        'keys': sorted_keys[first],
+        'rows': order[first],
+        'sorted_monetary': np.sort(np.asarray(monetary, dtype=np.float64)),
+    }
+
+
+class CustomerIndex:
+    """Sorted index from normalised CustomerID to row position, with a sorted monetary array.
+
+    Lookups are binary searches over plain arrays, so the index can be backed
+    by memory-mapped files shared between processes.
+    """
+
+    def __init__(self, keys, rows, sorted_monetary):
+        self.keys = keys
+        self.rows = rows
+        self.sorted_monetary = sorted_monetary
+
+    @classmethod
+    def from_columns(cls, customer_ids, monetary):
+        return cls(**customer_index_arrays(customer_ids, monetary))
+
+    @classmethod
+    def from_frame(cls, segments_df):
+        return cls.from_columns(segments_df['CustomerID'], segments_df['monetary'])
+
+    def __len__(self):
+        return len(self.sorted_monetary)
+
+    def lookup(self, customer_id):
+        """Row position of a customer, or None when the ID is unknown"""
+        key = normalise_customer_id(customer_id).encode('utf-8')
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.rows[i])
+        return None
+
+    def monetary_percentile(self, value):
+        """Percentage of customers whose monetary value is at or below ``value``"""
+        if not len(self):
+            return 0.0
+        return np.searchsorted(self.sorted_monetary, value, side='right') / len(self) * 100
+
+
+def range_index_arrays(segment_codes, n_segments, recency, monetary):
+    """Row positions grouped by segment code and sorted by recency and by monetary within each group"""
+    codes = np.asarray(segment_codes)
+    recency = np.asarray(recency)
+    monetary = np.asarray(monetary, dtype=np.float64)
+    # Sort by value first, then stably by segment, giving per-segment runs in value order
+    by_recency = np.argsort(recency, kind='stable')
+    by_recency = by_recency[np.argsort(codes[by_recency], kind='stable')]
+    by_monetary = np.argsort(monetary, kind='stable')
+    by_monetary = by_monetary[np.argsort(codes[by_monetary], kind='stable')]
+    return {
+        'bounds': np.searchsorted(codes[by_recency], np.arange(n_segments + 1)),
+        'recency_order': by_recency,
+        'recency_sorted': recency[by_recency],
+        'monetary_order': by_monetary,
+        'monetary_sorted': monetary[by_monetary],
+    }
+
+
+class SegmentRangeIndex:
+    """Per-segment row positions sorted by recency and by monetary value.
+
+    Range filters become two binary searches per segment; the narrower of the
+    two candidate slices is then checked against the other range, so a query
+    touches only rows that are already inside one of the ranges. Every segment
+    is a slice of a few flat arrays, which may be memory-mapped.
+    """
+
+    def __init__(self, segment_names, recency, monetary, bounds,
+                 recency_order, recency_sorted, monetary_order, monetary_sorted):
+        self.recency = recency
+        self.monetary = monetary
+        self.segments = {}
+        for code, name in enumerate(segment_names):
+            lo, hi = bounds[code], bounds[code + 1]
+            self.segments[name] = (
+                recency_order[lo:hi], recency_sorted[lo:hi],
+                monetary_order[lo:hi], monetary_sorted[lo:hi],
+            )
+
+    @classmethod
+    def from_columns(cls, segment_names, recency, monetary):
+        segment_names = pd.Categorical(segment_names)
+        recency = np.asarray(recency)
+        monetary = np.asarray(monetary, dtype=np.float64)
+        arrays = range_index_arrays(segment_names.codes, len(segment_names.categories), recency, monetary)
+        return cls(list(segment_names.categories), recency, monetary, **arrays)
+
+    @classmethod
+    def from_frame(cls, segments_df):
+        return cls.from_columns(segments_df['Segment_Name'], segments_df['recency_days'], segments_df['monetary'])
+
+    def iter_range(self, segments, min_recency, max_recency, min_monetary, max_monetary):
+        """Yield ``(segment, row_positions)`` for each selected segment matching both ranges"""
+        for name in segments:
+            entry = self.segments.get(name)
+            if entry is None:
+                continue
+            by_recency, recency_sorted, by_monetary, monetary_sorted = entry
+            r_lo = np.searchsorted(recency_sorted, min_recency, side='left')
+            r_hi = np.searchsorted(recency_sorted, max_recency, side='right')
+            m_lo = np.searchsorted(monetary_sorted, min_monetary, side='left')
+            m_hi = np.searchsorted(monetary_sorted, max_monetary, side='right')
+
+            if r_hi - r_lo <= m_hi - m_lo:
+                candidates = by_recency[r_lo:r_hi]
+                values = self.monetary[candidates]
+                yield name, candidates[(values >= min_monetary) & (values <= max_monetary)]
+            else:
+                candidates = by_monetary[m_lo:m_hi]
+                values = self.recency[candidates]
+                yield name, candidates[(values >= min_recency) & (values <= max_recency)]
+
+    def query(self, segments, min_recency, max_recency, min_monetary, max_monetary):
+        """Row positions (in frame order) of every customer matching the filters"""
+        parts = [rows for _, rows in self.iter_range(segments, min_recency, max_recency, min_monetary, max_monetary)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+
+def paginate(positions, sort_values=None, page=1, page_size=100, ascending=True):
+    """Row positions for one page of a filtered result, ordered by ``sort_values``.
+
+    ``sort_values`` is the full column (indexed by row position); only the
+    filtered positions are sorted, and the caller materialises just the page.
+    """
+    positions = np.asarray(positions)
+    if sort_values is not None and len(positions):
+        values = np.asarray(sort_values)[positions]
+        if ascending:
+            order = np.argsort(values, kind='stable')
+        else:
+            # Stable descending: sort the reversed values, then map back so ties keep their order
+            order = len(values) - 1 - np.argsort(values[::-1], kind='stable')[::-1]
+        positions = positions[order]
+    start = max(page - 1, 0) * page_size
+    return positions[start:start + page_size]
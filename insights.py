@@ -0,0 +1,91 @@
+"""Automated segment insights from configurable rule sets.
+
+A rule set grades one column of a per-segment statistics table (the
+``group_stats`` / ``SegmentCube.by_segment`` output) into ordered tiers; the
+first tier whose bound holds wins, as with ``SEGMENT_RULES`` in ``rfm.py``.
+Each rule is evaluated for every segment at once with vectorised masks, so
+more segments or rules add no passes over the customer frame, only a few more
+rows and columns in an already-aggregated table.
+
+Tiers take an optional strict ``below`` or ``above`` bound and a message
+template formatted with ``value`` (the graded column) and every column of the
+segment's statistics row. The defaults below can be replaced by a JSON list of
+rule sets in the same shape at ``Data/insight_rules.json``.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INSIGHT_RULES_PATH = Path('Data/insight_rules.json')
+
+DEFAULT_INSIGHT_RULES = [
+    {'name': 'Recency', 'column': 'recency_days_mean', 'tiers': [
+        {'below': 50, 'message': "✅ Excellent recency ({value:.1f} days) - customers are very active"},
+        {'below': 60, 'message': "⚠️ Moderate recency ({value:.1f} days) - monitor for engagement"},
+        {'message': "🔴 High recency ({value:.1f} days) - requires reactivation"},
+    ]},
+    {'name': 'Frequency', 'column': 'frequency_mean', 'tiers': [
+        {'above': 1.3, 'message': "✅ High frequency ({value:.2f}) - loyal, repeat customers"},
+        {'above': 1.1, 'message': "⚡ Moderate frequency ({value:.2f}) - potential for growth"},
+        {'message': "📉 Low frequency ({value:.2f}) - encourage repeat purchases"},
+    ]},
+    {'name': 'Monetary', 'column': 'monetary_mean', 'tiers': [
+        {'above': 2000, 'message': "💰 High value customers (avg £{value:,.0f}) - premium segment"},
+        {'above': 500, 'message': "💵 Mid-value customers (avg £{value:,.0f}) - upsell potential"},
+        {'message': "💳 Low value customers (avg £{value:,.0f}) - growth focus"},
+    ]},
+    {'name': 'Contribution', 'column': 'Revenue_Percent', 'tiers': [
+        {'message': "📊 Represents {Customers:,.0f} customers ({Customer_Percent:.1f}%) "
+                    "generating {value:.1f}% of total revenue"},
+    ]},
+]
+
+
+def load_insight_rules(path=INSIGHT_RULES_PATH):
+    """Rule sets from ``path`` when it exists, otherwise the defaults"""
+    path = Path(path)
+    if not path.exists():
+        return DEFAULT_INSIGHT_RULES
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def insight_stats(stats):
+    """Per-segment statistics plus the derived columns the rules can refer to"""
+    stats = stats.copy()
+    stats['Customer_Percent'] = stats['Customers'] / max(stats['Customers'].sum(), 1) * 100
+    return stats
+
+
+def rule_tiers(stats, rules=DEFAULT_INSIGHT_RULES):
+    """Index of the matching tier per segment (rows) and rule set (columns); -1 where none matches"""
+    tiers = {}
+    for rule in rules:
+        values = stats[rule['column']].to_numpy(dtype=np.float64)
+        conditions = []
+        for tier in rule['tiers']:
+            mask = ~np.isnan(values)
+            if 'below' in tier:
+                mask &= values < tier['below']
+            if 'above' in tier:
+                mask &= values > tier['above']
+            conditions.append(mask)
+        tiers[rule['name']] = np.select(conditions, np.arange(len(conditions)), default=-1)
+    return pd.DataFrame(tiers, index=stats.index)
+
+
+def segment_insights(stats, rules=DEFAULT_INSIGHT_RULES):
+    """Insight messages per segment (rows) and rule set (columns); empty where no tier matches"""
+    stats = insight_stats(stats)
+    tiers = rule_tiers(stats, rules)
+    rows = stats.to_dict('index')
+    messages = {}
+    for rule in rules:
+        templates = [tier['message'] for tier in rule['tiers']]
+        messages[rule['name']] = [
+            templates[tier].format(value=rows[segment][rule['column']], **rows[segment]) if tier >= 0 else ""
+            for segment, tier in tiers[rule['name']].items()
+        ]
+    return pd.DataFrame(messages, index=stats.index)
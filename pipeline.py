@@ -0,0 +1,118 @@
+"""Command-line refresh from the raw transaction CSV to every dashboard artefact.
+
+The transactions are split into CustomerID-hash partitions so that each
+customer lives in exactly one partition; per-partition RFM partials are
+computed in a process pool and merged by concatenation. Scoring, KMeans
+assignment and cluster profiles follow, then the location/gender dimension
+table is joined to the new segments. Every file under ``Data/processed/`` is
+replaced atomically so the dashboard never reads a half-written artefact.
+
+    python pipeline.py                      # refresh with the latest KMeans model
+    python pipeline.py --train --jobs 16    # also refit the model
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from clustering import MODEL_DIR, fit_model, load_model, save_model
+from data_cache import CACHE_DIR, PROCESSED_DIR, RAW_DATA_PATH, SEGMENTS_PATH, load_transactions
+from dimensions import DIMENSIONS_PATH, build_dimensions, dimension_sources, save_dimensions
+from rfm import STATE_PATH, RFMEngine, aggregate_transactions, write_artifacts
+from sketches import hash_values
+
+RFM_INPUT_COLUMNS = ['CustomerID', 'TransactionDate', 'TransactionAmount']
+
+
+def partition_ids(customer_ids, n_partitions):
+    """Stable partition number per row from a hash of its CustomerID"""
+    return (hash_values(customer_ids) % np.uint64(n_partitions)).astype(np.int64)
+
+
+def split_partitions(transactions, n_partitions):
+    """Yield the RFM input columns of each CustomerID-hash partition"""
+    columns = transactions[RFM_INPUT_COLUMNS]
+    partitions = partition_ids(columns['CustomerID'], n_partitions)
+    order = np.argsort(partitions, kind='stable')
+    bounds = np.searchsorted(partitions[order], np.arange(n_partitions + 1))
+    for i in range(n_partitions):
+        part = columns.iloc[order[bounds[i]:bounds[i + 1]]]
+        if isinstance(part['CustomerID'].dtype, pd.CategoricalDtype):
+            # Ship only this partition's IDs to the worker, not all categories
+            part = part.assign(CustomerID=part['CustomerID'].astype(str))
+        yield part
+
+
+def compute_rfm_state(transactions, n_partitions=None, n_jobs=None):
+    """Per-customer RFM state computed partition-parallel in a process pool"""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_partitions = n_partitions or n_jobs
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        partials = list(pool.map(aggregate_transactions, split_partitions(transactions, n_partitions)))
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return RFMEngine()
+    # Partitions hold disjoint customers, so merging is a plain concatenation
+    return RFMEngine(pd.concat(partials))
+
+
+def refresh(source=RAW_DATA_PATH, processed_dir=PROCESSED_DIR, model_dir=MODEL_DIR,
+            cache_dir=CACHE_DIR, n_partitions=None, n_jobs=None, train=False):
+    """Run the full refresh and return the RFM engine it produced"""
+    timings = {}
+
+    started = time.perf_counter()
+    transactions = load_transactions(source, cache_dir)
+    timings['load'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine = compute_rfm_state(transactions, n_partitions, n_jobs)
+    rfm = engine.rfm()
+    timings['rfm'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = None if train else load_model(model_dir)
+    if model is None:
+        model = fit_model(rfm)
+        save_model(model, model_dir)
+    timings['model'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    write_artifacts(rfm, processed_dir, model=model)
+    engine.save(Path(processed_dir) / STATE_PATH.name)
+    timings['write'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    segments_path = Path(processed_dir) / SEGMENTS_PATH.name
+    segments = pd.read_csv(segments_path, usecols=['CustomerID', 'Cluster', 'Segment_Name'])
+    dimensions = build_dimensions(transactions, segments, source=dimension_sources(source, segments_path))
+    save_dimensions(dimensions, Path(processed_dir) / DIMENSIONS_PATH.name)
+    timings['dimensions'] = time.perf_counter() - started
+
+    summary = ", ".join(f"{step} {seconds:.1f}s" for step, seconds in timings.items())
+    print(f"Refreshed {len(rfm):,} customers from {len(transactions):,} transactions "
+          f"with model {model.version} ({summary})")
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild all dashboard artefacts from the raw transactions")
+    parser.add_argument('--source', default=str(RAW_DATA_PATH), help="Raw transaction CSV")
+    parser.add_argument('--processed-dir', default=str(PROCESSED_DIR))
+    parser.add_argument('--model-dir', default=str(MODEL_DIR))
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR))
+    parser.add_argument('--partitions', type=int, default=None, help="CustomerID-hash partitions (default: one per worker)")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--train', action='store_true', help="Refit the KMeans model instead of reusing the latest")
+    args = parser.parse_args(argv)
+
+    refresh(args.source, args.processed_dir, args.model_dir, args.cache_dir,
+            args.partitions, args.jobs, args.train)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Dataset profile of the raw transactions for the Raw Data page.
+
+Null counts, distinct counts, the ``describe()`` table, the per-customer
+figures and the amount distribution each need one or more full scans of the
+transaction frame. They are computed once when the columnar cache is built and
+stored as a small JSON artefact beside it, so the page only reads them.
+Streaming mode produces the same profile from its chunk aggregates, with
+moments-only describe rows and histogram-interpolated quartiles.
+"""
+import json
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DistributionStats, distribution_stats
+from schema import memory_report
+
+HEAD_ROWS = 100
+
+
+def _frame_to_dict(df):
+    return None if df is None else json.loads(df.to_json(orient='split', date_format='iso'))
+
+
+def _frame_from_dict(data):
+    return None if data is None else pd.DataFrame(data['data'], index=data['index'], columns=data['columns'])
+
+
+def _distribution_to_dict(stats):
+    if stats is None:
+        return None
+    return {f.name: np.asarray(getattr(stats, f.name)).tolist() if f.name in ('bin_edges', 'bin_counts', 'outlier_sample')
+            else getattr(stats, f.name) for f in fields(stats)}
+
+
+def _distribution_from_dict(data):
+    if data is None:
+        return None
+    data = dict(data)
+    for name in ('bin_edges', 'bin_counts', 'outlier_sample'):
+        data[name] = np.asarray(data[name])
+    return DistributionStats(**data)
+
+
+@dataclass
+class DatasetProfile:
+    """Whole-dataset statistics shown on the Raw Data page"""
+    rows: int
+    columns: dict
+    missing: dict
+    distinct: dict
+    describe: pd.DataFrame
+    customers: int
+    total_amount: float
+    mean_amount: float
+    top_customer_total: float
+    avg_transactions_per_customer: float
+    amount: Optional[DistributionStats]
+    head: pd.DataFrame
+    memory: Optional[pd.DataFrame] = None
+    exact: bool = True
+    source: dict = field(default_factory=dict)
+
+    def to_dict(self):
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['describe'] = _frame_to_dict(self.describe)
+        data['head'] = _frame_to_dict(self.head)
+        data['memory'] = _frame_to_dict(self.memory)
+        data['amount'] = _distribution_to_dict(self.amount)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['describe'] = _frame_from_dict(data['describe'])
+        data['head'] = _frame_from_dict(data['head'])
+        data['memory'] = _frame_from_dict(data.get('memory'))
+        data['amount'] = _distribution_from_dict(data['amount'])
+        return cls(**data)
+
+
+def profile_frame(raw_df, source=None):
+    """Exact profile of a cleaned transaction frame, from one pass per statistic"""
+    numeric_cols = raw_df.select_dtypes(include=[np.number]).columns.tolist()
+    amounts = raw_df['TransactionAmount'] if 'TransactionAmount' in raw_df.columns else pd.Series(dtype=np.float64)
+
+    customers, top_customer_total, avg_transactions = 0, 0.0, 0.0
+    if 'CustomerID' in raw_df.columns and len(amounts):
+        grouped = amounts.groupby(raw_df['CustomerID'], observed=True)
+        customer_totals, customer_counts = grouped.sum(), grouped.size()
+        customers = len(customer_counts)
+        top_customer_total = float(customer_totals.max())
+        avg_transactions = float(customer_counts.mean())
+
+    return DatasetProfile(
+        rows=len(raw_df),
+        columns={column: str(dtype) for column, dtype in raw_df.dtypes.items()},
+        missing={column: int(count) for column, count in raw_df.isnull().sum().items()},
+        distinct={column: int(count) for column, count in raw_df.nunique().items()},
+        describe=raw_df[numeric_cols].describe() if numeric_cols else pd.DataFrame(),
+        customers=customers,
+        total_amount=float(amounts.sum()),
+        mean_amount=float(amounts.mean()) if len(amounts) else 0.0,
+        top_customer_total=top_customer_total,
+        avg_transactions_per_customer=avg_transactions,
+        amount=distribution_stats(amounts.to_numpy(), bins=50),
+        head=raw_df.head(HEAD_ROWS).reset_index(drop=True),
+        memory=memory_report(raw_df),
+        source=dict(source or {}),
+    )
@@ -0,0 +1,230 @@
+"""Out-of-core aggregates of the raw transaction file for the Raw Data page.
+
+A year of transactions does not fit in memory, but everything the Raw Data
+page shows is a mergeable aggregate: row and null counts, per-column moments,
+daily and hourly rollups, gender counts, a heavy-hitters sketch of the
+normalised locations and a fixed-edge amount histogram. Streaming mode reads
+the CSV in fixed-size chunks, folds each chunk into these aggregates and into
+the RFM engine, and saves the result next to the other processed artefacts.
+Memory is bounded by the chunk size plus one row of RFM state per customer.
+
+    python raw_aggregates.py Data/bank_data_C.csv --chunk-rows 500000
+"""
+import argparse
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregates import histogram_distribution_stats
+from clustering import MODEL_DIR, load_model
+from data_cache import PROCESSED_DIR, RAW_DATA_PATH, atomic_write_json, iter_raw_transactions, source_fingerprint
+from demographics import normalise_locations
+from profiling import HEAD_ROWS, DatasetProfile
+from rfm import STATE_PATH, RFMEngine, write_artifacts
+from rollups import RollupAccumulator, Rollups
+from sketches import HeavyHitters
+
+RAW_AGGREGATES_PATH = PROCESSED_DIR / 'raw_aggregates.json'
+CHUNK_ROWS = 1_000_000
+
+# Fixed log-spaced edges (20 bins per decade) so per-chunk histograms simply add
+AMOUNT_BIN_EDGES = np.concatenate(([0.0], np.geomspace(0.01, 1e8, 201)))
+
+
+def _add_counts(totals, counts):
+    for key, count in counts.items():
+        if count:
+            totals[key] = totals.get(key, 0) + int(count)
+
+
+@dataclass
+class RawAggregates:
+    """Mergeable summaries of the raw transactions, updated one chunk at a time"""
+    source: dict = field(default_factory=dict)
+    rows: int = 0
+    columns: dict = field(default_factory=dict)
+    missing: dict = field(default_factory=dict)
+    moments: dict = field(default_factory=dict)
+    gender_counts: dict = field(default_factory=dict)
+    location_sketch: HeavyHitters = field(default_factory=HeavyHitters)
+    amount_bin_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(AMOUNT_BIN_EDGES) - 1, dtype=np.int64))
+    customers: int = 0
+    top_customer_total: float = 0.0
+    avg_transactions_per_customer: float = 0.0
+    head: pd.DataFrame = field(default_factory=pd.DataFrame)
+    rollups: Optional[Rollups] = None
+    rollup_accumulator: Optional[RollupAccumulator] = field(default_factory=RollupAccumulator, repr=False)
+
+    def update(self, chunk):
+        """Fold one chunk of cleaned transactions into the aggregates"""
+        if not self.rows:
+            self.columns = {column: str(dtype) for column, dtype in chunk.dtypes.items()}
+        if self.head.empty:
+            self.head = chunk.head(HEAD_ROWS).reset_index(drop=True)
+        elif len(self.head) < HEAD_ROWS:
+            self.head = pd.concat([self.head, chunk.head(HEAD_ROWS - len(self.head))], ignore_index=True)
+        self.rows += len(chunk)
+        _add_counts(self.missing, chunk.isnull().sum())
+
+        for column in chunk.select_dtypes(include=[np.number]).columns:
+            values = chunk[column].to_numpy(dtype=np.float64)
+            values = values[np.isfinite(values)]
+            if not len(values):
+                continue
+            count, total, squares, low, high = self.moments.get(column, (0, 0.0, 0.0, np.inf, -np.inf))
+            self.moments[column] = (
+                count + len(values), total + float(values.sum()), squares + float(np.dot(values, values)),
+                min(low, float(values.min())), max(high, float(values.max())),
+            )
+
+        if self.rollup_accumulator is not None:
+            self.rollup_accumulator.update(chunk)
+
+        if 'CustGender' in chunk.columns:
+            _add_counts(self.gender_counts, chunk['CustGender'].value_counts())
+        if 'CustLocation' in chunk.columns:
+            self.location_sketch.update(normalise_locations(chunk['CustLocation']))
+
+        if 'TransactionAmount' in chunk.columns:
+            amounts = chunk['TransactionAmount'].to_numpy(dtype=np.float64)
+            amounts = amounts[np.isfinite(amounts)]
+            bins = np.clip(np.searchsorted(AMOUNT_BIN_EDGES, amounts, side='right') - 1, 0, len(self.amount_bin_counts) - 1)
+            self.amount_bin_counts += np.bincount(bins, minlength=len(self.amount_bin_counts))
+        return self
+
+    def finish(self, rfm_state):
+        """Close the rollups and record the per-customer figures from the RFM state built alongside"""
+        if self.rollup_accumulator is not None:
+            self.rollups = self.rollup_accumulator.result()
+        self.customers = int(len(rfm_state))
+        if self.customers:
+            self.top_customer_total = float(rfm_state['monetary'].max())
+            self.avg_transactions_per_customer = float(rfm_state['frequency'].mean())
+        return self
+
+    @property
+    def total_amount(self):
+        return self.moments.get('TransactionAmount', (0, 0.0))[1]
+
+    @property
+    def mean_amount(self):
+        count, total = self.moments.get('TransactionAmount', (0, 0.0))[:2]
+        return total / count if count else 0.0
+
+    def describe(self):
+        """``describe()``-style table of the numeric columns (no quartiles)"""
+        table = {}
+        for column, (count, total, squares, low, high) in self.moments.items():
+            mean = total / count
+            variance = (squares - count * mean ** 2) / (count - 1) if count > 1 else np.nan
+            table[column] = {'count': count, 'mean': mean, 'std': np.sqrt(max(variance, 0.0)), 'min': low, 'max': high}
+        return pd.DataFrame(table)
+
+    def amount_distribution(self):
+        """Approximate transaction amount histogram and box statistics"""
+        if 'TransactionAmount' not in self.moments:
+            return None
+        _, _, _, low, high = self.moments['TransactionAmount']
+        return histogram_distribution_stats(AMOUNT_BIN_EDGES, self.amount_bin_counts, self.mean_amount, low, high)
+
+    def profile(self):
+        """Dataset profile from the chunk aggregates (approximate quartiles, no distinct counts)"""
+        return DatasetProfile(
+            rows=self.rows,
+            columns=self.columns,
+            missing={column: self.missing.get(column, 0) for column in self.columns},
+            distinct={'CustomerID': self.customers} if self.customers else {},
+            describe=self.describe(),
+            customers=self.customers,
+            total_amount=self.total_amount,
+            mean_amount=self.mean_amount,
+            top_customer_total=self.top_customer_total,
+            avg_transactions_per_customer=self.avg_transactions_per_customer,
+            amount=self.amount_distribution(),
+            head=self.head,
+            exact=False,
+            source=self.source,
+        )
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'rows': self.rows,
+            'columns': self.columns,
+            'missing': self.missing,
+            'moments': {column: list(values) for column, values in self.moments.items()},
+            'gender_counts': {str(k): v for k, v in self.gender_counts.items()},
+            'location_sketch': self.location_sketch.to_dict(),
+            'amount_bin_counts': self.amount_bin_counts.tolist(),
+            'customers': self.customers,
+            'top_customer_total': self.top_customer_total,
+            'avg_transactions_per_customer': self.avg_transactions_per_customer,
+            'head': json.loads(self.head.to_json(orient='split', index=False, date_format='iso')),
+            'rollups': None if self.rollups is None else self.rollups.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['moments'] = {column: tuple(values) for column, values in data['moments'].items()}
+        data['location_sketch'] = HeavyHitters.from_dict(data['location_sketch'])
+        data['rollups'] = None if data.get('rollups') is None else Rollups.from_dict(data['rollups'])
+        data['amount_bin_counts'] = np.asarray(data['amount_bin_counts'], dtype=np.int64)
+        head = data['head']
+        data['head'] = pd.DataFrame(head['data'], columns=head['columns'])
+        return cls(**data)
+
+
+def stream_transactions(path=RAW_DATA_PATH, chunk_rows=CHUNK_ROWS, engine=None):
+    """Fold the transaction file chunk by chunk into raw aggregates and an RFM engine"""
+    engine = RFMEngine() if engine is None else engine
+    aggregates = RawAggregates(source=source_fingerprint(path))
+    for chunk in iter_raw_transactions(path, chunk_rows):
+        aggregates.update(chunk)
+        engine.fold(chunk)
+    aggregates.finish(engine.state)
+    return aggregates, engine
+
+
+def save_raw_aggregates(aggregates, path=RAW_AGGREGATES_PATH):
+    atomic_write_json(path, aggregates.to_dict())
+
+
+def load_raw_aggregates(path=RAW_AGGREGATES_PATH, source=RAW_DATA_PATH):
+    """Saved aggregates, or None when absent, in an older format or built from a different source file"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path) as fh:
+            aggregates = RawAggregates.from_dict(json.load(fh))
+    except (KeyError, TypeError):
+        # Written by an older version with different fields; re-run streaming mode
+        return None
+    if Path(source).exists() and source_fingerprint(source) != aggregates.source:
+        return None
+    return aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream the transaction file into Raw Data aggregates and RFM artefacts")
+    parser.add_argument('source', nargs='?', default=str(RAW_DATA_PATH), help="Transaction CSV in bank_data_C.csv format")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows read per chunk")
+    parser.add_argument('--processed-dir', default=str(PROCESSED_DIR))
+    parser.add_argument('--model-dir', default=str(MODEL_DIR), help="KMeans model used to re-score segments")
+    args = parser.parse_args(argv)
+
+    processed_dir = Path(args.processed_dir)
+    aggregates, engine = stream_transactions(args.source, args.chunk_rows)
+    save_raw_aggregates(aggregates, processed_dir / RAW_AGGREGATES_PATH.name)
+    engine.save(processed_dir / STATE_PATH.name)
+    write_artifacts(engine.rfm(), processed_dir, model=load_model(args.model_dir))
+    print(f"Streamed {aggregates.rows:,} transactions from {aggregates.customers:,} customers")
+
+
+if __name__ == '__main__':
+    main()
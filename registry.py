@@ -0,0 +1,94 @@
+"""Process-wide registry of shared, versioned data frames.
+
+``st.cache_data`` pickles its return value and hands every caller a fresh
+copy, so the 1M-row transaction frame is copied on every rerun of every
+session. The registry keeps one instance of each dataset per process instead,
+treated as immutable by its readers (code that needs to modify one takes an
+explicit ``.copy()`` first), and versions it by the content hash of its source
+files. Each access costs one ``stat`` per file: when mtime or size move the
+files are re-hashed and the dataset is reloaded only if the content changed,
+so one file changing invalidates only the datasets built from it.
+Asking for a version never loads the dataset, so pages that only read
+artefacts keyed by it do not pay for the frame.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from data_cache import file_digest, source_fingerprint
+
+
+def content_version(paths):
+    """Version key from the content hashes of a set of files"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        digest.update(f"{path}:{file_digest(path)}|".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class Dataset:
+    """One registered dataset: its source files, loader and the loaded value"""
+    paths: tuple
+    loader: Callable
+    fingerprints: Optional[list] = None
+    version: Optional[str] = None
+    value: object = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class DataRegistry:
+    """Named datasets loaded once per content version and shared read-only"""
+
+    def __init__(self):
+        self.datasets = {}
+
+    def register(self, name, paths, loader):
+        """Register ``loader(*paths)`` as dataset ``name``; nothing is loaded yet"""
+        self.datasets[name] = Dataset(tuple(Path(path) for path in paths), loader)
+
+    @staticmethod
+    def _sync(dataset):
+        """Re-check the source files (caller holds the lock); changed content drops the loaded value"""
+        fingerprints = [source_fingerprint(path) for path in dataset.paths]
+        if dataset.version is not None and fingerprints == dataset.fingerprints:
+            return
+        version = content_version(dataset.paths)
+        if version != dataset.version:
+            dataset.value = None
+            dataset.version = version
+        dataset.fingerprints = fingerprints
+
+    def get(self, name):
+        """The shared value of a dataset, loaded on first use and reloaded if its files changed"""
+        dataset = self.datasets[name]
+        with dataset.lock:
+            self._sync(dataset)
+            if dataset.value is None:
+                dataset.value = dataset.loader(*dataset.paths)
+            return dataset.value
+
+    def version(self, *names):
+        """Content version of one or more datasets, for use as a cache key (does not load them)"""
+        versions = []
+        for name in names:
+            dataset = self.datasets[name]
+            with dataset.lock:
+                self._sync(dataset)
+                versions.append(dataset.version)
+        return '-'.join(versions)
+
+    def refresh(self, *names):
+        """Re-hash the sources on next access; unchanged content keeps the loaded value"""
+        for name in names:
+            with self.datasets[name].lock:
+                self.datasets[name].fingerprints = None
+
+    def invalidate(self, *names):
+        """Drop the loaded values so the next access reloads them"""
+        for name in names:
+            dataset = self.datasets[name]
+            with dataset.lock:
+                dataset.fingerprints = dataset.version = dataset.value = None
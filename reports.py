@@ -0,0 +1,143 @@
+"""Segmentation summary report for the Download Center.
+
+All per-segment figures come from one grouped statistics pass (the segment
+cube for the KMeans segments, plus one pass over the rule-based RFM segments);
+the text, CSV, Markdown and HTML variants are all rendered from that single
+result.
+"""
+import html
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+REPORT_TITLE = "BankTrust Retail Banking Customer Segmentation Report"
+
+# Report column -> (stats column, text label, format)
+REPORT_COLUMNS = {
+    'Customers': ('Customers', 'Customers', '{:,.0f}'),
+    'Avg_Recency': ('recency_days_mean', 'Average Recency', '{:.1f} days'),
+    'Avg_Frequency': ('frequency_mean', 'Average Frequency', '{:.2f}'),
+    'Avg_Monetary': ('monetary_mean', 'Average Monetary', '£{:,.0f}'),
+    'Total_Revenue': ('monetary_sum', 'Total Revenue', '£{:,.0f}'),
+    'Revenue_Percent': ('Revenue_Percent', 'Revenue %', '{:.1f}%'),
+}
+
+
+@dataclass
+class SegmentReport:
+    """Totals plus one statistics table per segmentation"""
+    generated: datetime
+    totals: dict
+    sections: dict = field(default_factory=dict)
+
+
+def _report_table(stats):
+    table = pd.DataFrame({name: stats[column] for name, (column, _, _) in REPORT_COLUMNS.items()})
+    table.index = table.index.astype(str)
+    table.index.name = 'Segment'
+    return table
+
+
+def build_report(cube, rfm_stats=None, generated=None):
+    """Collect report figures from the segment cube and, if given, the rule-based RFM segment statistics.
+
+    Both inputs are already aggregated (``rfm_stats`` is the ``group_stats`` of
+    the RFM frame by ``segment``), so a report can be rebuilt with a fresh
+    ``generated`` time whenever it is rendered.
+    """
+    totals = {
+        'Total Customers': f"{cube.customers:,}",
+        'Total Revenue': f"£{cube.total_revenue:,.0f}",
+        'Average Revenue per Customer': f"£{cube.overall_mean('monetary'):,.0f}",
+        'Number of Segments': f"{len(cube.by_segment)}",
+    }
+    report = SegmentReport(generated=generated or datetime.now(), totals=totals)
+    report.sections['SEGMENT ANALYSIS'] = _report_table(cube.by_segment)
+    if rfm_stats is not None:
+        report.sections['RULE-BASED RFM SEGMENT ANALYSIS'] = _report_table(rfm_stats)
+    return report
+
+
+def _formatted_rows(table):
+    for segment, row in table.iterrows():
+        yield segment, [(label, fmt.format(row[name])) for name, (_, label, fmt) in REPORT_COLUMNS.items()]
+
+
+def render_text(report):
+    lines = [
+        "",
+        REPORT_TITLE,
+        f"Generated: {report.generated.strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "EXECUTIVE SUMMARY",
+        "=================",
+    ]
+    lines += [f"{label}: {value}" for label, value in report.totals.items()]
+    for title, table in report.sections.items():
+        lines += ["", title, "=" * len(title)]
+        for segment, values in _formatted_rows(table):
+            lines += ["", segment, "---------"]
+            lines += [f"{label}: {value}" for label, value in values]
+    return "\n".join(lines) + "\n"
+
+
+def render_csv(report):
+    tables = [table.reset_index().assign(Section=title) for title, table in report.sections.items()]
+    combined = pd.concat(tables, ignore_index=True)
+    return combined[['Section'] + [c for c in combined.columns if c != 'Section']].round(2).to_csv(index=False)
+
+
+def render_markdown(report):
+    labels = [label for _, label, _ in REPORT_COLUMNS.values()]
+    lines = [
+        f"# {REPORT_TITLE}",
+        "",
+        f"_Generated: {report.generated.strftime('%Y-%m-%d %H:%M:%S')}_",
+        "",
+        "## Executive Summary",
+        "",
+    ]
+    lines += [f"- **{label}:** {value}" for label, value in report.totals.items()]
+    for title, table in report.sections.items():
+        lines += ["", f"## {title.title()}", "", "| Segment | " + " | ".join(labels) + " |",
+                  "|" + "---|" * (len(labels) + 1)]
+        for segment, values in _formatted_rows(table):
+            lines.append(f"| {segment.strip()} | " + " | ".join(value for _, value in values) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def render_html(report):
+    labels = [label for _, label, _ in REPORT_COLUMNS.values()]
+    parts = [
+        f"<html><head><meta charset='utf-8'><title>{html.escape(REPORT_TITLE)}</title></head><body>",
+        f"<h1>{html.escape(REPORT_TITLE)}</h1>",
+        f"<p><em>Generated: {report.generated.strftime('%Y-%m-%d %H:%M:%S')}</em></p>",
+        "<h2>Executive Summary</h2><ul>",
+    ]
+    parts += [f"<li><strong>{html.escape(label)}:</strong> {html.escape(value)}</li>" for label, value in report.totals.items()]
+    parts.append("</ul>")
+    for title, table in report.sections.items():
+        parts.append(f"<h2>{html.escape(title.title())}</h2><table border='1' cellpadding='4'>")
+        parts.append("<tr><th>Segment</th>" + "".join(f"<th>{html.escape(label)}</th>" for label in labels) + "</tr>")
+        for segment, values in _formatted_rows(table):
+            cells = "".join(f"<td>{html.escape(value)}</td>" for _, value in values)
+            parts.append(f"<tr><td>{html.escape(segment.strip())}</td>{cells}</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+# Format name -> (renderer, file extension, MIME type)
+REPORT_FORMATS = {
+    'TXT': (render_text, 'txt', 'text/plain'),
+    'CSV': (render_csv, 'csv', 'text/csv'),
+    'Markdown': (render_markdown, 'md', 'text/markdown'),
+    'HTML': (render_html, 'html', 'text/html'),
+}
+
+
+def render_report(report, report_format='TXT'):
+    """Render a report in one of ``REPORT_FORMATS``"""
+    renderer, _, _ = REPORT_FORMATS[report_format]
+    return renderer(report)
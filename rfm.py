@@ -0,0 +1,269 @@
+"""Incremental RFM engine.
+
+The notebooks rebuild the RFM table from the full transaction history with a
+per-group Python lambda for recency. The engine here keeps one row of state
+per customer (last transaction date, transaction count, amount sum) and folds
+new transaction batches into it, so a nightly refresh only touches the day's
+delta file. Recency is derived from the state against the snapshot date, which
+moves forward as later transactions arrive.
+
+    python rfm.py Data/deltas/2016-10-22.csv
+    python rfm.py --rebuild Data/bank_data_C.csv
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from clustering import MODEL_DIR, load_model, score_segments, write_segment_artifacts
+from data_cache import PROCESSED_DIR, RFM_SCORES_PATH, SEGMENTS_PATH, atomic_write, atomic_write_json, parse_raw_transactions
+from schema import RFM_SCHEMA, SEGMENT_SCHEMA, apply_schema
+
+STATE_PATH = PROCESSED_DIR / 'rfm_state.parquet'
+
+STATE_COLUMNS = ['last_date', 'frequency', 'monetary']
+
+# Cumulative rank fractions separating the five score bands
+QUINTILES = (0.2, 0.4, 0.6, 0.8)
+
+# Rule-based segments from the refinement notebook, first match wins.
+# Bounds are inclusive (min, max) score ranges; None leaves a side open.
+SEGMENT_RULES = [
+    ('Champions', {'R': (4, None), 'F': (4, None), 'M': (4, None)}),
+    ('Loyal', {'R': (4, None), 'F': (3, None)}),
+    ('Potential Loyalists', {'R': (3, None), 'F': (2, None), 'M': (3, None)}),
+    ('At Risk', {'R': (None, 2), 'F': (None, 2), 'M': (None, 2)}),
+    ('Need Attention', {'R': (None, 2), 'F': (4, None)}),
+]
+DEFAULT_SEGMENT = 'Others'
+
+# Cluster labels of customers the KMeans model has not scored yet
+UNASSIGNED_CLUSTER = -1
+UNASSIGNED_SEGMENT = 'Unassigned'
+
+
+def empty_state():
+    """Per-customer RFM state with no customers"""
+    return pd.DataFrame({
+        'last_date': pd.Series(dtype='datetime64[ns]'),
+        'frequency': pd.Series(dtype='int64'),
+        'monetary': pd.Series(dtype='float64'),
+    }, index=pd.Index([], name='CustomerID', dtype=object))
+
+
+def aggregate_transactions(transactions):
+    """Collapse transactions into per-customer (last_date, frequency, monetary) partials"""
+    txns = transactions.dropna(subset=['CustomerID', 'TransactionDate'])
+    grouped = txns.groupby('CustomerID', observed=True, sort=False)
+    partial = pd.DataFrame({
+        'last_date': grouped['TransactionDate'].max(),
+        'frequency': grouped.size().astype('int64'),
+        'monetary': grouped['TransactionAmount'].sum().astype('float64'),
+    })
+    partial.index = partial.index.astype(str).rename('CustomerID')
+    return partial
+
+
+def merge_partials(*partials):
+    """Combine per-customer partials: latest date wins, counts and sums add"""
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return empty_state()
+    if len(partials) == 1:
+        return partials[0]
+    grouped = pd.concat(partials).groupby(level=0, sort=False)
+    merged = pd.DataFrame({
+        'last_date': grouped['last_date'].max(),
+        'frequency': grouped['frequency'].sum(),
+        'monetary': grouped['monetary'].sum(),
+    })
+    merged.index.name = 'CustomerID'
+    return merged
+
+
+class RFMEngine:
+    """Per-customer RFM state that new transaction batches are folded into"""
+
+    def __init__(self, state=None, snapshot_date=None):
+        self.state = empty_state() if state is None else state[STATE_COLUMNS]
+        if snapshot_date is None and len(self.state):
+            snapshot_date = self.state['last_date'].max() + pd.Timedelta(days=1)
+        self.snapshot_date = None if snapshot_date is None else pd.Timestamp(snapshot_date)
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        engine = cls()
+        engine.fold(transactions)
+        return engine
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        """Load saved state; a missing state file gives an empty engine"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        state = pd.read_parquet(path).set_index('CustomerID')
+        snapshot_date = None
+        meta_path = path.with_suffix('.json')
+        if meta_path.exists():
+            with open(meta_path) as fh:
+                snapshot_date = json.load(fh).get('snapshot_date')
+        return cls(state, snapshot_date)
+
+    def save(self, path=STATE_PATH):
+        path = Path(path)
+        atomic_write(path, lambda tmp_path: self.state.reset_index().to_parquet(tmp_path, index=False))
+        meta = {
+            'snapshot_date': None if self.snapshot_date is None else self.snapshot_date.isoformat(),
+            'customers': int(len(self.state)),
+            'transactions': int(self.state['frequency'].sum()),
+        }
+        atomic_write_json(path.with_suffix('.json'), meta)
+
+    def fold(self, transactions):
+        """Fold a batch of transactions into the state and advance the snapshot date"""
+        partial = aggregate_transactions(transactions)
+        self.fold_partial(partial)
+        return self
+
+    def fold_partial(self, partial):
+        """Fold an already-aggregated per-customer partial into the state"""
+        if not len(partial):
+            return self
+        self.state = merge_partials(self.state, partial)
+        self.advance(partial['last_date'].max() + pd.Timedelta(days=1))
+        return self
+
+    def advance(self, snapshot_date):
+        """Move the snapshot date forward (never backwards)"""
+        snapshot_date = pd.Timestamp(snapshot_date)
+        if self.snapshot_date is None or snapshot_date > self.snapshot_date:
+            self.snapshot_date = snapshot_date
+        return self
+
+    def rfm(self):
+        """RFM table in the shape of ``rfm_scores.csv`` (empty before any transactions are folded)"""
+        if self.snapshot_date is None:
+            # The snapshot date is only unset while the state has no customers
+            recency = np.empty(len(self.state), dtype=np.int64)
+        else:
+            recency = (self.snapshot_date - self.state['last_date']).dt.days.to_numpy()
+        rfm = pd.DataFrame({
+            'CustomerID': self.state.index.astype(str),
+            'recency_days': recency,
+            'frequency': self.state['frequency'].to_numpy(),
+            'monetary': self.state['monetary'].to_numpy(),
+        })
+        return apply_schema(rfm, RFM_SCHEMA)
+
+
+def quantile_scores(values, boundaries=QUINTILES, reverse=False):
+    """Score values 1-5 by rank bands, matching ``pd.qcut(rank(method="first"), 5)``.
+
+    Ties are broken by position (a stable argsort), and each rank is placed in
+    its band with one ``searchsorted`` against the band edges.
+    """
+    if len(boundaries) != 4:
+        raise ValueError("RFM scoring needs exactly four band boundaries")
+    values = np.asarray(values)
+    n = len(values)
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[np.argsort(values, kind='stable')] = np.arange(1, n + 1)
+    edges = 1 + np.sort(np.asarray(boundaries, dtype=np.float64)) * (n - 1)
+    scores = np.searchsorted(edges, ranks, side='left') + 1
+    if reverse:
+        scores = len(boundaries) + 2 - scores
+    return scores.astype(np.int8)
+
+
+def assign_segments(r_scores, f_scores, m_scores):
+    """Map score arrays to rule-based segment names with vectorised masks"""
+    scores = {'R': np.asarray(r_scores), 'F': np.asarray(f_scores), 'M': np.asarray(m_scores)}
+    conditions = []
+    for _, bounds in SEGMENT_RULES:
+        mask = np.ones(len(scores['R']), dtype=bool)
+        for key, (low, high) in bounds.items():
+            if low is not None:
+                mask &= scores[key] >= low
+            if high is not None:
+                mask &= scores[key] <= high
+        conditions.append(mask)
+    names = [name for name, _ in SEGMENT_RULES]
+    codes = np.select(conditions, np.arange(len(names)), default=len(names))
+    return pd.Categorical.from_codes(codes, categories=names + [DEFAULT_SEGMENT])
+
+
+def score_rfm(rfm, boundaries=QUINTILES):
+    """Add R/F/M scores, the ``RFM_score`` string and the rule-based segment"""
+    r_scores = quantile_scores(rfm['recency_days'].to_numpy(), boundaries, reverse=True)
+    f_scores = quantile_scores(rfm['frequency'].to_numpy(), boundaries)
+    m_scores = quantile_scores(rfm['monetary'].to_numpy(), boundaries)
+
+    score_labels = [f"{r}{f}{m}" for r in range(1, 6) for f in range(1, 6) for m in range(1, 6)]
+    score_codes = (r_scores.astype(np.int16) - 1) * 25 + (f_scores - 1) * 5 + (m_scores - 1)
+
+    scored = rfm[['CustomerID', 'recency_days', 'frequency', 'monetary']].copy(deep=False)
+    scored['R_score'] = r_scores
+    scored['F_score'] = f_scores
+    scored['M_score'] = m_scores
+    scored['RFM_score'] = pd.Categorical.from_codes(score_codes, categories=score_labels)
+    scored['segment'] = assign_segments(r_scores, f_scores, m_scores)
+    return scored
+
+
+def write_csv_atomic(df, path):
+    """Write a CSV via a temporary file so the dashboard never reads a partial file"""
+    atomic_write(path, lambda tmp_path: df.to_csv(tmp_path, index=False))
+
+
+def write_artifacts(rfm, processed_dir=PROCESSED_DIR, model=None):
+    """Write the refreshed ``rfm_scores.csv`` and segment files that ``load_data()`` reads.
+
+    Scores and rule-based segments are recomputed from the RFM values. With a
+    trained KMeans model every customer is assigned to its nearest centroid
+    and the segments and cluster profile files are rewritten; without one the
+    existing cluster labels are kept and only the recency/frequency/monetary
+    columns of the segments file are refreshed; customers new since the last
+    scoring are kept with ``UNASSIGNED_CLUSTER`` / ``UNASSIGNED_SEGMENT``.
+    """
+    processed_dir = Path(processed_dir)
+    rfm = score_rfm(rfm)
+    write_csv_atomic(rfm, processed_dir / RFM_SCORES_PATH.name)
+
+    if model is not None:
+        write_segment_artifacts(score_segments(model, rfm), processed_dir)
+        return
+
+    segments_path = processed_dir / SEGMENTS_PATH.name
+    if segments_path.exists():
+        labels = pd.read_csv(segments_path, usecols=['CustomerID', 'Cluster', 'Segment_Name'])
+        segments = rfm[['CustomerID', 'recency_days', 'frequency', 'monetary']].astype({'CustomerID': str}).merge(
+            labels, on='CustomerID', how='left'
+        )
+        segments['Cluster'] = segments['Cluster'].fillna(UNASSIGNED_CLUSTER).astype(np.int64)
+        segments['Segment_Name'] = segments['Segment_Name'].fillna(UNASSIGNED_SEGMENT)
+        write_csv_atomic(apply_schema(segments, SEGMENT_SCHEMA), segments_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold transaction batches into the RFM state and refresh artefacts")
+    parser.add_argument('batches', nargs='+', help="Transaction CSV files in bank_data_C.csv format")
+    parser.add_argument('--state', default=str(STATE_PATH), help="RFM state file")
+    parser.add_argument('--processed-dir', default=str(PROCESSED_DIR), help="Directory for refreshed artefacts")
+    parser.add_argument('--rebuild', action='store_true', help="Discard saved state and start from these batches")
+    parser.add_argument('--model-dir', default=str(MODEL_DIR), help="KMeans model used to re-score segments")
+    args = parser.parse_args(argv)
+
+    engine = RFMEngine() if args.rebuild else RFMEngine.load(args.state)
+    for batch_path in args.batches:
+        engine.fold(parse_raw_transactions(batch_path))
+    engine.save(args.state)
+    write_artifacts(engine.rfm(), args.processed_dir, model=load_model(args.model_dir))
+    snapshot = 'none' if engine.snapshot_date is None else engine.snapshot_date.date()
+    print(f"RFM state: {len(engine.state):,} customers, snapshot {snapshot}")
+
+
+if __name__ == '__main__':
+    main()
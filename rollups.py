@@ -0,0 +1,179 @@
+"""Time-series rollups of the raw transactions.
+
+The finest stored grains are one row per calendar day (transactions, revenue,
+distinct customers) and one row per day and hour of ``TransactionTime``
+(transactions, revenue), keyed by integer ``YYYYMMDD`` dates. Month and
+weekday views are re-aggregations of the few hundred daily rows, so no chart
+touches transaction rows. Rollups of a whole frame count customers exactly;
+chunked rollups estimate them with per-day HyperLogLog sketches.
+"""
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sketches import hash_values, hll_estimate, hll_update
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+NAT_DAY = np.iinfo(np.int64).min
+
+
+def day_numbers(dates):
+    """Days since 1970-01-01 as int64 (NaT keeps numpy's minimum-int sentinel)"""
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def date_keys(days):
+    """``YYYYMMDD`` integers for day numbers"""
+    dates = np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    day_of_month = (dates - dates.astype('datetime64[M]')).astype(np.int64) + 1
+    return (years * 10000 + months * 100 + day_of_month).astype(np.int64)
+
+
+def _rollup_columns(raw_df):
+    """Day number, hour and amount of every row with a transaction date"""
+    days = day_numbers(raw_df['TransactionDate'])
+    valid = days != NAT_DAY
+    if 'TransactionTime' in raw_df.columns:
+        times = pd.to_numeric(raw_df['TransactionTime'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        hours = np.clip(times // 10000, 0, 23)
+    else:
+        hours = np.zeros(len(raw_df), dtype=np.int64)
+    amounts = raw_df['TransactionAmount'].to_numpy(dtype=np.float64) if 'TransactionAmount' in raw_df.columns \
+        else np.zeros(len(raw_df))
+    return valid, days[valid], hours[valid], np.nan_to_num(amounts[valid])
+
+
+def _sum_by(keys, amounts):
+    """Transaction count and revenue per key (an array, or a list of arrays for two levels)"""
+    grouped = pd.Series(amounts).groupby(keys, sort=True)
+    return pd.DataFrame({'Transactions': grouped.size(), 'Revenue': grouped.sum()})
+
+
+def _frame_to_dict(df):
+    return json.loads(df.reset_index().to_json(orient='split', index=False))
+
+
+def _frame_from_dict(data, index):
+    return pd.DataFrame(data['data'], columns=data['columns']).set_index(index)
+
+
+@dataclass
+class Rollups:
+    """Daily and hourly transaction rollups with derived month and weekday views"""
+    daily: pd.DataFrame
+    hourly: pd.DataFrame
+    exact: bool = True
+
+    def monthly(self):
+        """Transactions, revenue and average daily active customers per ``YYYY-MM``"""
+        daily = self.daily
+        grouped = daily.groupby(daily.index // 100, sort=True)
+        monthly = pd.DataFrame({
+            'Transactions': grouped['Transactions'].sum(),
+            'Revenue': grouped['Revenue'].sum(),
+            'Avg Daily Customers': grouped['Customers'].mean(),
+        })
+        monthly.index = [f"{key // 100:04d}-{key % 100:02d}" for key in monthly.index]
+        monthly.index.name = 'Month'
+        return monthly
+
+    def weekday(self):
+        """Totals and per-day averages by day of week, Monday first"""
+        daily = self.daily
+        weekdays = pd.to_datetime(daily.index.astype(str), format='%Y%m%d').dayofweek
+        grouped = daily.groupby(weekdays)
+        weekday = pd.DataFrame({
+            'Transactions': grouped['Transactions'].sum(),
+            'Revenue': grouped['Revenue'].sum(),
+            'Days': grouped.size(),
+            'Avg Daily Customers': grouped['Customers'].mean(),
+        }).reindex(range(7), fill_value=0)
+        weekday.index = WEEKDAYS
+        weekday.index.name = 'Weekday'
+        return weekday
+
+    def days(self, start=None, end=None):
+        """Daily rows between two ``YYYYMMDD`` keys (inclusive), indexed by date"""
+        daily = self.daily.loc[start:end]
+        return daily.set_axis(pd.to_datetime(daily.index.astype(str), format='%Y%m%d')).rename_axis('Date')
+
+    def hours(self, start=None, end=None):
+        """Hourly rows between two ``YYYYMMDD`` keys (inclusive), indexed by timestamp"""
+        hourly = self.hourly.loc[start:end] if len(self.hourly) else self.hourly
+        dates = pd.to_datetime(hourly.index.get_level_values('date').astype(str), format='%Y%m%d')
+        stamps = dates + pd.to_timedelta(hourly.index.get_level_values('hour'), unit='h')
+        return hourly.set_axis(stamps).rename_axis('Hour')
+
+    def to_dict(self):
+        return {
+            'daily': _frame_to_dict(self.daily),
+            'hourly': _frame_to_dict(self.hourly),
+            'exact': self.exact,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            daily=_frame_from_dict(data['daily'], 'date'),
+            hourly=_frame_from_dict(data['hourly'], ['date', 'hour']),
+            exact=data['exact'],
+        )
+
+
+def _finish(daily, hourly, exact):
+    daily.index = pd.Index(date_keys(daily.index.to_numpy()), name='date')
+    hourly_days = hourly.index.get_level_values(0).to_numpy()
+    hourly.index = pd.MultiIndex.from_arrays(
+        [date_keys(hourly_days), hourly.index.get_level_values(1).to_numpy()], names=['date', 'hour']
+    )
+    return Rollups(daily=daily, hourly=hourly, exact=exact)
+
+
+def build_rollups(raw_df):
+    """Exact rollups of a whole transaction frame"""
+    valid, days, hours, amounts = _rollup_columns(raw_df)
+    daily = _sum_by(days, amounts)
+    if 'CustomerID' in raw_df.columns:
+        customer_ids = raw_df['CustomerID']
+        if isinstance(customer_ids.dtype, pd.CategoricalDtype):
+            codes = customer_ids.cat.codes.to_numpy()
+            customer_ids = pd.Series(codes).where(codes >= 0)
+        customers = pd.Series(customer_ids.to_numpy()[valid])
+        daily['Customers'] = customers.groupby(days).nunique().reindex(daily.index, fill_value=0)
+    else:
+        daily['Customers'] = 0
+    hourly = _sum_by([days, hours], amounts)
+    return _finish(daily, hourly, exact=True)
+
+
+class RollupAccumulator:
+    """Rollups folded chunk by chunk; distinct customers come from per-day sketches"""
+
+    def __init__(self):
+        self.daily = None
+        self.hourly = None
+        self.registers = {}
+
+    def update(self, chunk):
+        if 'TransactionDate' not in chunk.columns:
+            return self
+        valid, days, hours, amounts = _rollup_columns(chunk)
+        daily = _sum_by(days, amounts)
+        hourly = _sum_by([days, hours], amounts)
+        self.daily = daily if self.daily is None else self.daily.add(daily, fill_value=0)
+        self.hourly = hourly if self.hourly is None else self.hourly.add(hourly, fill_value=0)
+        if 'CustomerID' in chunk.columns:
+            hll_update(self.registers, days, hash_values(chunk['CustomerID'])[valid])
+        return self
+
+    def result(self):
+        if self.daily is None:
+            return None
+        daily = self.daily.astype({'Transactions': np.int64})
+        daily['Customers'] = [round(hll_estimate(self.registers[day])) if day in self.registers else 0
+                              for day in daily.index]
+        return _finish(daily, self.hourly.astype({'Transactions': np.int64}), exact=False)
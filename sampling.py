@@ -0,0 +1,70 @@
+"""Deterministic stratified sampling for scatter plots.
+
+A plain ``df.sample(n)`` redraws a different subset on every rerun and lets
+small segments vanish. The sampler here allocates the sample across groups
+with a per-group floor, then thins dense regions of RFM space inside each
+group so the plot keeps its outline without drawing thousands of overlapping
+points. A fixed seed makes the same inputs give the same sample.
+"""
+import numpy as np
+
+DENSITY_COLUMNS = ('recency_days', 'frequency', 'monetary')
+
+
+def allocate_sample(group_sizes, n, floor=100):
+    """Split ``n`` draws across groups: a floor each, the rest proportional to size"""
+    sizes = np.asarray(group_sizes, dtype=np.int64)
+    n = min(int(n), int(sizes.sum()))
+    floors = np.minimum(sizes, floor)
+    if floors.sum() >= n:
+        shares = floors / max(floors.sum(), 1) * n
+    else:
+        spare = sizes - floors
+        shares = floors + spare / max(spare.sum(), 1) * (n - floors.sum())
+
+    allocation = np.floor(shares).astype(np.int64)
+    shortfall = n - allocation.sum()
+    if shortfall > 0:
+        # Largest remainders first, only where the group still has rows left
+        remainders = np.where(allocation < sizes, shares - allocation, -1.0)
+        allocation[np.argsort(-remainders, kind='stable')[:shortfall]] += 1
+    return np.minimum(allocation, sizes)
+
+
+def density_weights(features, grid_bins=10, thinning=0.5):
+    """Sampling weights that shrink with the population of each point's grid cell.
+
+    Features are log1p-scaled onto a ``grid_bins`` grid per dimension; a point in
+    a cell holding ``c`` points gets weight ``c ** -thinning`` (0 = uniform,
+    1 = every occupied cell equally likely).
+    """
+    features = np.log1p(np.clip(np.asarray(features, dtype=np.float64), 0, None))
+    cells = np.zeros(len(features), dtype=np.int64)
+    for column in features.T:
+        low, high = column.min(), column.max()
+        scaled = np.zeros(len(column), dtype=np.int64) if high <= low else \
+            np.minimum(((column - low) / (high - low) * grid_bins).astype(np.int64), grid_bins - 1)
+        cells = cells * grid_bins + scaled
+    _, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    return counts[inverse].astype(np.float64) ** -thinning
+
+
+def stratified_sample(df, by, n, floor=100, seed=42, columns=DENSITY_COLUMNS, grid_bins=10, thinning=0.5):
+    """Row positions of a reproducible stratified, density-thinned sample of ``df``"""
+    rng = np.random.default_rng(seed)
+    groups = df.groupby(by, observed=True).indices
+    names = sorted(groups, key=str)
+    allocation = allocate_sample([len(groups[name]) for name in names], n, floor)
+
+    features = df[list(columns)].to_numpy(dtype=np.float64)
+    picked = []
+    for name, size in zip(names, allocation):
+        positions = groups[name]
+        if size >= len(positions):
+            picked.append(positions)
+        elif size > 0:
+            weights = density_weights(features[positions], grid_bins, thinning)
+            picked.append(rng.choice(positions, size=size, replace=False, p=weights / weights.sum()))
+    if not picked:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(picked))
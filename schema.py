@@ -0,0 +1,114 @@
+"""Central dtype schema for the dashboard's data frames.
+
+Left to inference, pandas keeps IDs, genders, locations and segment names as
+Python object strings and every number as 64-bit. Each schema below maps a
+column to a compact kind that is applied once at load time:
+
+- ``category``: low-cardinality labels (gender, location, segment names)
+- ``string``: high-cardinality IDs, stored Arrow-backed when pyarrow is present
+- ``integer``: counts/days/times, downcast to the smallest integer that fits
+- ``float32``: floats downcast only when every value survives to the cent
+- ``float64``: amounts that get summed for display and must keep precision
+- ``datetime``: already-parsed dates, left as ``datetime64``
+"""
+import numpy as np
+import pandas as pd
+
+# Bumped whenever a schema changes so cached columnar files are rebuilt
+SCHEMA_VERSION = 3
+
+TRANSACTION_SCHEMA = {
+    'TransactionID': 'string',
+    'CustomerID': 'string',
+    'CustomerDOB': 'datetime',
+    'CustGender': 'category',
+    'CustLocation': 'category',
+    'CustAccountBalance': 'float32',
+    'TransactionDate': 'datetime',
+    'TransactionTime': 'integer',
+    'TransactionAmount': 'float64',
+    'TransactionDateTime': 'datetime',
+}
+
+SEGMENT_SCHEMA = {
+    'CustomerID': 'string',
+    'recency_days': 'integer',
+    'frequency': 'integer',
+    'monetary': 'float64',
+    'Cluster': 'integer',
+    'Segment_Name': 'category',
+}
+
+RFM_SCHEMA = {
+    'CustomerID': 'string',
+    'recency_days': 'integer',
+    'frequency': 'integer',
+    'monetary': 'float64',
+    'R_score': 'integer',
+    'F_score': 'integer',
+    'M_score': 'integer',
+    'RFM_score': 'category',
+    'segment': 'category',
+}
+
+PROFILE_SCHEMA = {
+    'Cluster': 'integer',
+    'Customers': 'integer',
+}
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return object
+
+
+def _to_integer(series):
+    if series.isna().any():
+        return series
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _to_float32(series):
+    if series.dtype == np.float32:
+        return series
+    values = pd.to_numeric(series, errors='coerce')
+    downcast = values.astype(np.float32)
+    error = np.abs(downcast.astype(np.float64) - values)
+    if np.nanmax(error.to_numpy(), initial=0.0) < 0.005:
+        return downcast
+    return values
+
+
+def apply_schema(df, schema):
+    """Return ``df`` with every column named in ``schema`` cast to its compact kind"""
+    converters = {
+        'category': lambda s: s.astype('category'),
+        'string': lambda s: s.astype(_string_dtype()),
+        'integer': _to_integer,
+        'float32': _to_float32,
+        'float64': lambda s: pd.to_numeric(s, errors='coerce').astype(np.float64),
+        'datetime': lambda s: s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors='coerce'),
+    }
+    df = df.copy(deep=False)
+    for column, kind in schema.items():
+        if column in df.columns:
+            df[column] = converters[kind](df[column])
+    return df
+
+
+def memory_report(df):
+    """Per-column deep memory usage, largest first, with a total row"""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Column': usage.index,
+        'Dtype': [str(df[col].dtype) for col in usage.index],
+        'Memory (MB)': (usage.values / 1024 ** 2).round(2),
+    }).sort_values('Memory (MB)', ascending=False)
+    total = pd.DataFrame({
+        'Column': ['Total'],
+        'Dtype': [''],
+        'Memory (MB)': [round(usage.sum() / 1024 ** 2, 2)],
+    })
+    return pd.concat([report, total], ignore_index=True)
@@ -0,0 +1,124 @@
+"""Mergeable streaming sketches for aggregates that cannot simply be added.
+
+Counts and sums from separate chunks add up, but distinct counts do not. The
+HyperLogLog registers here estimate distinct customers per key from 64-bit
+hashes, so chunks can be folded in any order with bounded memory. Per-key
+counts over thousands of free-text keys do add up, but without bound; the
+Misra-Gries summary keeps only the heaviest keys with a known error.
+"""
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 12  # 4096 registers per key, about 1.6% standard error
+HEAVY_HITTERS_CAPACITY = 1000
+
+
+def hash_values(values):
+    """Stable 64-bit hashes of the values' string form"""
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Hash each category once and broadcast through the codes
+        category_hashes = pd.util.hash_pandas_object(
+            pd.Series(values.cat.categories.astype(str)), index=False
+        ).to_numpy()
+        return category_hashes[values.cat.codes.to_numpy()]
+    return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+
+
+def hll_observations(hashes, precision=HLL_PRECISION):
+    """Register index and rank (1 + leading zeros of the remaining bits) of each hash"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # A guard bit caps the rank at 64 - precision + 1 when the remaining bits are zero
+    remaining = (hashes << np.uint64(precision)) | np.uint64(1 << (precision - 1))
+    bit_length = np.frexp(remaining.astype(np.float64))[1]
+    rank = (65 - bit_length).astype(np.uint8)
+    return index, rank
+
+
+def hll_update(registers, keys, hashes, precision=HLL_PRECISION):
+    """Fold ``hashes`` into per-key registers; ``registers`` maps key -> uint8 array"""
+    keys = np.asarray(keys)
+    if not len(keys):
+        return registers
+    index, rank = hll_observations(hashes, precision)
+    unique_keys, key_codes = np.unique(keys, return_inverse=True)
+    block = np.zeros((len(unique_keys), 1 << precision), dtype=np.uint8)
+    np.maximum.at(block, (key_codes, index), rank)
+    for key, row in zip(unique_keys.tolist(), block):
+        if key in registers:
+            np.maximum(registers[key], row, out=registers[key])
+        else:
+            registers[key] = row
+    return registers
+
+
+def hll_estimate(registers):
+    """Distinct-count estimate from one register array"""
+    registers = np.asarray(registers, dtype=np.float64)
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(2.0 ** -registers)
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Small-range correction: linear counting over the empty registers
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
+
+
+class HeavyHitters:
+    """Misra-Gries summary of the most frequent keys in a stream, mergeable chunk by chunk.
+
+    At most ``capacity`` counters are kept. Each kept count undercounts its key
+    by at most ``error``, and every key seen more than ``error`` times is kept.
+    """
+
+    def __init__(self, capacity=HEAVY_HITTERS_CAPACITY, counts=None, error=0, total=0):
+        self.capacity = capacity
+        self.counts = pd.Series(counts if counts is not None else {}, dtype=np.int64)
+        self.error = error
+        self.total = total
+
+    def update(self, values):
+        """Count one chunk of keys (missing values are skipped)"""
+        return self.merge_counts(pd.Series(values, copy=False).value_counts())
+
+    def merge_counts(self, counts):
+        """Fold exact per-key counts into the summary"""
+        counts = counts[counts > 0].astype(np.int64)
+        counts.index = counts.index.astype(str)
+        self.total += int(counts.sum())
+        combined = self.counts.add(counts, fill_value=0).astype(np.int64)
+        if len(combined) > self.capacity:
+            # Subtract the first count that does not fit from every kept counter
+            combined = combined.sort_values(ascending=False, kind='stable')
+            cut = int(combined.iloc[self.capacity])
+            combined = combined.iloc[:self.capacity] - cut
+            combined = combined[combined > 0]
+            self.error += cut
+        self.counts = combined
+        return self
+
+    def merge(self, other):
+        """Fold another summary into this one"""
+        total = self.total + other.total
+        self.merge_counts(other.counts)
+        self.error += other.error
+        self.total = total
+        return self
+
+    def top(self, n):
+        """The ``n`` heaviest keys and their (lower-bound) counts"""
+        return self.counts.nlargest(n)
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'counts': {key: int(count) for key, count in self.counts.items()},
+            'error': self.error,
+            'total': self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)